@@ -0,0 +1,42 @@
+"""
+Starting a level with a cold and then a warm asset cache.
+
+    python benchmarks/bench_assets.py
+
+The warm starts should show no cache misses, meaning no file was read or
+decoded for them.
+"""
+from __future__ import print_function
+
+import time
+
+import common
+
+import data
+import levels
+import schrocat
+
+def start(window):
+    misses = data.cache.misses
+    begin = time.time()
+    window.init(levels=[levels.LevelOne])
+    return time.time() - begin, data.cache.misses - misses
+
+def main():
+    window = schrocat.Schrocat(640, 480, visible=False)
+
+    rows = []
+    for run in ('cold', 'warm', 'warm'):
+        taken, misses = start(window)
+        rows.append((run, '%.2f' % (taken * 1000), misses))
+    common.table(('cache', 'level start ms', 'misses'), rows)
+
+    print()
+    common.table(('asset', 'bytes'),
+                 [(' '.join(str(k) for k in key), nbytes)
+                  for key, nbytes in data.cache.sizes()] +
+                 [('total', data.cache.held)])
+    window.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Texture binds per frame, one texture per sprite versus the atlas.
+
+Build the atlas first (make atlas), then:
+
+    python benchmarks/bench_atlas.py
+
+"""
+from __future__ import print_function
+
+import common
+
+import atlas
+import levels
+import profiling
+import schrocat
+
+def binds(window, use_atlas):
+    schrocat.Schrocat.use_atlas = use_atlas
+    window.init(levels=[levels.LevelThree])
+    return profiling.texture_binds(window.batch)
+
+def main():
+    if atlas.load() is None:
+        print('no atlas, build it with: python teamstrong/atlas.py')
+        return
+
+    window = schrocat.Schrocat(640, 480, visible=False)
+    rows = [('separate images', binds(window, False)),
+            ('atlas', binds(window, True))]
+    schrocat.Schrocat.use_atlas = True
+
+    common.table(('sprites from', 'texture binds/frame'), rows)
+    window.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Barnes-Hut against the exact batched sum, from a handful of vortexes up to a
+sandbox full of them: how long the forces take and how far off they are.
+
+    python benchmarks/bench_barnes_hut.py
+
+Times are best of several runs of the arrays in, forces out part of a frame.
+Build is a full rebuild of the tree, which happens whenever a vortex is
+added, moved or hit (a hit changes its strength), so in a busy game it is
+every frame. Speedup counts a rebuild in every frame, lookup speedup is the
+tree alone for frames where nothing changed. Error is the size of the
+difference over the size of the exact force.
+"""
+from __future__ import print_function
+
+import common
+import forces
+
+from constants import BARNES_HUT_WELLS, BARNES_HUT_PAIRS
+
+def scene(nballs, nwells, width=640, height=480):
+    numpy = forces.numpy
+    rand = numpy.random.RandomState(nballs * 10000 + nwells)
+    balls = numpy.column_stack((rand.uniform(-20, width + 20, nballs),
+                                rand.uniform(-20, height + 20, nballs),
+                                numpy.ones(nballs)))
+    wells = numpy.column_stack((rand.uniform(0, width, nwells),
+                                rand.uniform(0, height, nwells),
+                                numpy.full(nwells, 1e6),
+                                rand.uniform(0.1, 1.0, nwells)))
+    return balls, wells
+
+def main():
+    if not forces.numpy:
+        print('numpy is not installed, nothing to compare against.')
+        return
+
+    numpy = forces.numpy
+    rows = []
+    for nwells in (10, 50, 100, 200, 500, 1000, 2000, 5000):
+        for nballs in (50, 500):
+            balls, wells = scene(nballs, nwells)
+            exact = forces.net_forces(balls, wells)
+            direct = common.best_of(lambda: forces.net_forces(balls, wells),
+                                    repeat=3, number=5)
+            for theta in (0.3, 0.5, 0.8):
+                tree = forces.BarnesHut(theta=theta)
+                build = common.best_of(lambda: tree.build(wells),
+                                       repeat=3, number=5)
+
+                approx = tree.forces(balls)
+                lookup = common.best_of(lambda: tree.forces(balls),
+                                        repeat=3, number=5)
+                error = (numpy.hypot(*(approx - exact).T) /
+                         numpy.maximum(numpy.hypot(*exact.T), 1e-12))
+                rows.append((nwells, nballs, theta,
+                             '%.3f' % (direct * 1e3),
+                             '%.3f' % (build * 1e3),
+                             '%.3f' % (lookup * 1e3),
+                             '%.1fx' % (direct / (build + lookup)),
+                             '%.1fx' % (direct / lookup),
+                             '%.1e' % numpy.median(error),
+                             '%.1e' % numpy.percentile(error, 99)))
+
+    common.table(('vortexes', 'balls', 'theta', 'direct ms', 'build ms',
+                  'tree ms', 'speedup', 'lookup speedup', 'median err',
+                  '99% err'), rows)
+    print()
+    print('apply_net_forces switches to the tree at %d vortexes and %d '
+          'balls x vortexes, see BARNES_HUT_WELLS and BARNES_HUT_PAIRS.' % (
+                  BARNES_HUT_WELLS, BARNES_HUT_PAIRS))
+
+if __name__ == '__main__':
+    main()
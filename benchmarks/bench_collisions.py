@@ -0,0 +1,84 @@
+"""
+Python collision callbacks per second, begin handler versus layers.
+
+200 balls drift around inside 4 vortex shapes. The old way every ball and
+vortex pair touching crossed into Python for a begin callback that said
+"no thanks"; with collision layers the pair never gets that far.
+
+    python benchmarks/bench_collisions.py
+
+The masks are our own rather than the game's: in the game a ball reaches
+into the vortex layer so it can hit a core, see constants.BALL_LAYER.
+"""
+from __future__ import print_function
+
+import random
+import time
+
+import common
+
+import pymunk
+
+from constants import BALL_TYPE, GRAVITY_TYPE, ALL_LAYERS
+
+BALLS = 200
+WELLS = [(200, 150), (440, 150), (200, 330), (440, 330)]
+FRAMES = 300
+
+# balls and vortexes on layers that don't overlap, so they never meet.
+BALL_LAYER = 1 << 0
+GRAVITY_LAYER = 1 << 1
+
+def build(use_layers):
+    space = pymunk.Space()
+    space.gravity = (0, 0)
+    calls = [0]
+
+    def begin(space, arbiter):
+        calls[0] += 1
+        return False
+
+    space.add_collision_handler(GRAVITY_TYPE, BALL_TYPE,
+                                begin, None, None, None)
+
+    for x, y in WELLS:
+        body = pymunk.Body(pymunk.inf, pymunk.inf)
+        body.position = x, y
+        shape = pymunk.Circle(body, 25)
+        shape.collision_type = GRAVITY_TYPE
+        shape.layers = GRAVITY_LAYER if use_layers else ALL_LAYERS
+        space.add_static(shape)
+
+    rand = random.Random(BALLS)
+    for i in range(BALLS):
+        x, y = WELLS[i % len(WELLS)]
+        body = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 5))
+        body.position = x + rand.uniform(-20, 20), y + rand.uniform(-20, 20)
+        body.velocity = rand.uniform(-30, 30), rand.uniform(-30, 30)
+        shape = pymunk.Circle(body, 5)
+        shape.collision_type = BALL_TYPE
+        shape.layers = BALL_LAYER if use_layers else ALL_LAYERS
+        space.add(body, shape)
+
+    return space, calls
+
+def run(use_layers):
+    space, calls = build(use_layers)
+    start = time.time()
+    for _ in range(FRAMES):
+        space.step(1/30.0)
+    taken = time.time() - start
+    return calls[0], calls[0] / taken, taken * 1e3 / FRAMES
+
+def main():
+    pymunk.init_pymunk()
+
+    rows = []
+    for name, use_layers in (('begin handler', False), ('layers', True)):
+        calls, per_second, ms = run(use_layers)
+        rows.append((name, calls, '%.0f' % per_second, '%.3f' % ms))
+
+    common.table(('filtering', 'callbacks', 'callbacks/s', 'ms/step'), rows)
+
+if __name__ == '__main__':
+    main()
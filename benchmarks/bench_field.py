@@ -0,0 +1,105 @@
+"""
+Gravity from a ForceField grid versus the exact batched sum: how long a
+frame's forces take and how far off the grid is.
+
+    python benchmarks/bench_field.py
+
+Error is the size of the difference over the size of the exact force, for
+balls scattered over the screen (and a little off it).
+
+The frame columns include reading the balls and wells and handing the forces
+back, the kernel columns are just the arrays in, forces out part.
+"""
+from __future__ import print_function
+
+import random
+import time
+
+import common
+import forces
+
+class Point(object):
+    """Just enough of a Ball or Gravity for the force code."""
+
+    def __init__(self, x, y, mass, strength=1.0, radius=25):
+        self.x, self.y = x, y
+        self.mass = mass
+        self.strength = strength
+        self.radius = radius
+        self.force = (0, 0)
+
+def scene(nballs, nwells, width=640, height=480):
+    rand = random.Random(nballs * 1000 + nwells)
+    balls = [Point(rand.uniform(-20, width + 20),
+                   rand.uniform(-20, height + 20), 1)
+             for _ in range(nballs)]
+    wells = [Point(rand.uniform(0, width), rand.uniform(0, height), 1e6,
+                   rand.uniform(0.1, 1.0))
+             for _ in range(nwells)]
+    return balls, wells
+
+def errors(field, balls, wells):
+    numpy = forces.numpy
+    b = forces.gather(balls, 'x', 'y', 'mass')
+    exact = forces.net_forces(b, forces.gather(wells, 'x', 'y', 'mass',
+                                               'strength'))
+    field.sync(wells)
+    approx = field.forces(b)
+    error = (numpy.hypot(*(approx - exact).T) /
+             numpy.maximum(numpy.hypot(*exact.T), 1e-12))
+    return numpy.median(error), numpy.percentile(error, 99), error.max()
+
+def main():
+    if not forces.numpy:
+        print('numpy is not installed, nothing to compare against.')
+        return
+
+    rows = []
+    for nwells in (4, 50, 500):
+        for nballs in (10, 100, 1000):
+            balls, wells = scene(nballs, nwells)
+            b = forces.gather(balls, 'x', 'y', 'mass')
+            w = forces.gather(wells, 'x', 'y', 'mass', 'strength')
+            direct = common.best_of(
+                    lambda: forces.apply_net_forces(balls, wells))
+            direct_kernel = common.best_of(lambda: forces.net_forces(b, w))
+            for spacing in (2, 4, 8):
+                field = forces.ForceField(640, 480, spacing=spacing)
+                field.sync(wells)
+                lookup = common.best_of(
+                        lambda: forces.apply_net_forces(balls, wells, field))
+                lookup_kernel = common.best_of(lambda: field.forces(b))
+                median, p99, worst = errors(field, balls, wells)
+                rows.append((nwells, nballs, spacing,
+                             '%.3f' % (direct * 1e3), '%.3f' % (lookup * 1e3),
+                             '%.3f' % (direct_kernel * 1e3),
+                             '%.3f' % (lookup_kernel * 1e3),
+                             '%.1fx' % (direct_kernel / lookup_kernel),
+                             '%.1e' % median, '%.1e' % p99, '%.1e' % worst))
+
+    common.table(('vortexes', 'balls', 'spacing', 'direct frame ms',
+                  'field frame ms', 'direct kernel ms', 'field kernel ms',
+                  'kernel speedup', 'median err', '99% err', 'worst err'),
+                 rows)
+
+    # what it costs when a ball hits a vortex and it gets stronger.
+    print()
+    balls, wells = scene(10, 50)
+    rows = []
+    for spacing in (2, 4, 8):
+        field = forces.ForceField(640, 480, spacing=spacing)
+        begin = time.time()
+        field.sync(wells)
+        full = time.time() - begin
+
+        def one():
+            wells[0].strength += 0.2
+            field.sync(wells)
+        rows.append((spacing, '%.2f' % (full * 1e3),
+                     '%.3f' % (common.best_of(one) * 1e3),
+                     '%.1f' % (field.nbytes / 1e6)))
+    common.table(('spacing', '50 vortex build ms', 'one vortex ms', 'MB'),
+                 rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Per-object gravity sum versus the batched numpy kernel.
+
+    python benchmarks/bench_gravity.py
+
+"""
+from __future__ import print_function
+
+import random
+
+import common
+import forces
+
+class Point(object):
+    """Just enough of a Ball or Gravity for the force code."""
+
+    def __init__(self, x, y, mass, strength=1.0):
+        self.x, self.y = x, y
+        self.mass = mass
+        self.strength = strength
+        self.force = (0, 0)
+
+def scene(nballs, nwells=8, width=640, height=480):
+    rand = random.Random(nballs)
+    balls = [Point(rand.uniform(0, width), rand.uniform(0, height), 1)
+             for _ in range(nballs)]
+    wells = [Point(rand.uniform(0, width), rand.uniform(0, height), 1e6,
+                   rand.uniform(0.1, 1.0))
+             for _ in range(nwells)]
+    return balls, wells
+
+def per_object(balls, wells):
+    for ball in balls:
+        ball.force = forces.net_force_on(ball, wells)
+
+def main():
+    if not forces.numpy:
+        print('numpy is not installed, nothing to compare against.')
+        return
+
+    rows = []
+    for nballs in (10, 100, 1000):
+        balls, wells = scene(nballs)
+        slow = common.best_of(lambda: per_object(balls, wells))
+        fast = common.best_of(lambda: forces.apply_net_forces(balls, wells))
+        rows.append((nballs, len(wells), '%.3f' % (slow * 1e3),
+                     '%.3f' % (fast * 1e3), '%.1fx' % (slow / fast)))
+
+    common.table(('balls', 'vortexes', 'per-object ms', 'batched ms',
+                  'speedup'), rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Loading every image the game uses, decoding the PNGs (cold) versus reading
+the on disk cache of decoded pixels (warm).
+
+    python benchmarks/bench_imagecache.py
+
+Uses a throwaway cache directory, the real one is left alone.
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import common
+
+import data
+import imagecache
+
+def images():
+    root = data.filepath('')
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if filename.endswith('.png'):
+                yield os.path.join(dirpath, filename)
+
+def load_all(cache, paths):
+    begin = time.time()
+    for path in paths:
+        cache.load(path)
+    return time.time() - begin
+
+def main():
+    paths = list(images())
+    directory = tempfile.mkdtemp()
+    try:
+        cache = imagecache.DiskImageCache(directory)
+        cold = load_all(cache, paths)
+        warm = common.best_of(lambda: load_all(cache, paths), number=1)
+        print('%d images, %d decoded, %d read from the cache' %
+              (len(paths), cache.misses, cache.hits))
+    finally:
+        shutil.rmtree(directory)
+
+    common.table(('cache', 'ms to load all'),
+                 [('cold', '%.2f' % (cold * 1000)),
+                  ('warm', '%.2f' % (warm * 1000))])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Idle CPU and frames drawn per minute on the menu, redrawing only on changes
+against redrawing flat out like the menu used to (--redraw-always).
+
+Starts the game with --cpu-usage, leaves the menu alone for a while, reads
+the once a second reports and closes it again, both ways.
+
+    python benchmarks/bench_menu.py
+
+Needs a display. The CPU meter's own once a second report still draws a
+frame, so an idle menu shows about 60 frames a minute rather than none.
+"""
+from __future__ import print_function
+
+import os
+import re
+import subprocess
+import sys
+
+import common
+
+# reports to skip while the menu starts up, and to average after that.
+SETTLE = 2
+REPORTS = 10
+
+REPORT = re.compile(r'cpu\s+([\d.]+)% busy, +(\d+) frames in ([\d.]+)s')
+
+def idle(*flags):
+    """Average (busy percent, frames a minute) of an untouched menu."""
+    game = subprocess.Popen([sys.executable, '-u',
+                             os.path.join(common.ROOT, 'run_game.py'),
+                             '--cpu-usage'] + list(flags),
+                            stdout=subprocess.PIPE, universal_newlines=True)
+
+    reports = []
+    for line in iter(game.stdout.readline, ''):
+        match = REPORT.search(line)
+        if match:
+            reports.append([float(value) for value in match.groups()])
+            if len(reports) == SETTLE + REPORTS:
+                break
+    game.terminate()
+    game.communicate()
+
+    reports = reports[SETTLE:]
+    if not reports:
+        return None
+    seconds = sum(elapsed for busy, frames, elapsed in reports)
+    busy = sum(busy * elapsed for busy, frames, elapsed in reports) / seconds
+    frames = sum(frames for busy, frames, elapsed in reports)
+    return busy, frames * 60 / seconds
+
+def main():
+    rows = []
+    for name, flags in (('redraw always (before)', ['--redraw-always']),
+                        ('redraw on change', [])):
+        measured = idle(*flags)
+        if measured is None:
+            print('%s: the game never reported, is there a display?' % name)
+            return 1
+        busy, per_minute = measured
+        rows.append((name, '%.1f' % busy, '%d' % per_minute))
+
+    common.table(('menu', 'cpu % busy', 'frames a minute'), rows)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
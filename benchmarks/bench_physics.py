@@ -0,0 +1,237 @@
+"""
+pymunk against the NumPy physics backend: do balls end up in the same
+place, and how many balls a second can each move.
+
+    python benchmarks/bench_physics.py
+
+Agreement launches balls one at a time past a few vortexes and follows
+them for a few seconds on each backend. With the NumPy backend drifting
+then kicking like pymunk does ('euler') and taking every step whole the
+paths and the vortex hits must match to rounding, or this exits non zero.
+
+The leapfrog integrator and substeps the NumPy backend uses by default
+follow their own, better, path, so at the game's step they wander from
+pymunk by as much as pymunk's own error. They are checked against pymunk
+taking REFERENCE_SUBSTEPS steps a tick instead, which is as near the real
+path as pymunk gets: every ball must hit the same vortex on the same tick
+(or miss) and stay within TOLERANCE pixels of it all the way, or this exits
+non zero. How far pymunk at the game's step is from that is shown too, along
+with the energy each integrator loses or gains over a long orbit.
+
+Throughput times a whole physics tick (read the balls, work out the pull,
+set the forces, step) with every ball in flight at once, without substeps.
+"""
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+import common
+
+import actors
+import forces
+import physics
+from constants import BALL_TYPE, GRAVITY_TYPE
+
+# pymunk 1.0 wants this before a space is made.
+actors.init_pymunk()
+
+DT = 1 / 30.0
+WELLS = [((200, 150), 0.5), ((440, 150), 0.3), ((200, 330), 0.8),
+         ((440, 330), 0.4)]
+IMAGE = actors.NullImage(10, 10)
+
+# pymunk steps a tick for the reference path the default integrator has to
+# stay within TOLERANCE pixels of.
+REFERENCE_SUBSTEPS = 64
+TOLERANCE = 15.0
+
+def world(name, integrator=None, wells=WELLS):
+    """
+    A backend with these wells in, and a list of hits as they happen. The
+    NumPy backend only substeps with the default integrator.
+
+    """
+    backend = physics.BACKENDS[name]()
+    if integrator is not None:
+        backend.integrator = integrator
+        backend.max_substeps = 1
+
+    hits = []
+    backend.on_hit(BALL_TYPE, GRAVITY_TYPE,
+                   lambda ball, well: hits.append((ball.tick, well.index)))
+
+    gravities = []
+    for index, ((x, y), strength) in enumerate(wells):
+        gravity = actors.make_gravity(x, y, None, IMAGE, backend)
+        gravity.strength = strength
+        gravity.index = index
+        gravities.append(gravity)
+    backend.add(gravities)
+
+    backend.gravity = forces.puller(gravities)
+    return backend, gravities, hits
+
+def launch(backend, balls):
+    """Balls from (x, y, vx, vy), added to the backend."""
+    made = []
+    for x, y, vx, vy in balls:
+        ball = actors.make_ball(x, y, None, IMAGE, backend)
+        ball.velocity = (vx, vy)
+        ball.tick = 0
+        made.append(ball)
+    backend.add(made)
+    return made
+
+def step(backend, balls, gravities, dt=DT):
+    backend.set_forces(balls, forces.pull(backend.state(balls), gravities))
+    backend.step(dt)
+
+def tick(backend, balls, gravities):
+    step(backend, balls, gravities)
+    for ball in balls:
+        ball.tick += 1
+
+def follow(name, shot, ticks, integrator=None, substeps=1):
+    """
+    Where one ball is after each tick, and what it hit when. With substeps
+    each tick is that many steps, stopping at a hit the way the NumPy
+    backend's own substeps do.
+    """
+    backend, gravities, hits = world(name, integrator)
+    ball, = launch(backend, [shot])
+    path = []
+    for _ in range(ticks):
+        for _ in range(substeps):
+            if not hits:
+                step(backend, [ball], gravities, DT / substeps)
+        ball.tick += 1
+        path.append((ball.x, ball.y))
+
+        # a ball that hits something is gone, as far as the game cares.
+        if hits:
+            break
+    return path, hits
+
+def apart(one, other):
+    """The furthest apart two paths get, over the ticks both have."""
+    worst = 0.0
+    for (x1, y1), (x2, y2) in zip(one, other):
+        worst = max(worst, abs(x1 - x2), abs(y1 - y2))
+    return worst
+
+def energy(ball, gravities):
+    vx, vy = ball.velocity
+    return (0.5 * ball.mass * (vx * vx + vy * vy) -
+            sum(forces.potential(g, ball) for g in gravities))
+
+def drift(name, integrator=None, seconds=60):
+    """Relative change in energy of one ball orbiting one well."""
+    backend, gravities, hits = world(name, integrator,
+                                     wells=[((320, 240), 1.0)])
+
+    # fast enough for a round orbit at this distance.
+    radius = 120.0
+    well = gravities[0]
+    speed = (forces.G * forces.FUDGE * well.mass * well.strength /
+             radius) ** 0.5
+    ball, = launch(backend, [(320 + radius, 240, 0, speed)])
+
+    before = energy(ball, gravities)
+    for _ in range(int(seconds / DT)):
+        tick(backend, [ball], gravities)
+    return abs(energy(ball, gravities) - before) / abs(before)
+
+def agreement():
+    rand = random.Random(1)
+    shots = [(rand.uniform(20, 80), rand.uniform(20, 460),
+              rand.uniform(100, 400), rand.uniform(-100, 100))
+             for _ in range(20)]
+
+    rows = []
+    agree = True
+    for number, shot in enumerate(shots):
+        reference, reference_hits = follow('pymunk', shot, 150)
+        same, same_hits = follow('numpy', shot, 150, 'euler')
+
+        euler_apart = apart(reference, same)
+        if euler_apart > 1e-6 or same_hits != reference_hits:
+            agree = False
+
+        fine, fine_hits = follow('pymunk', shot, 150,
+                                 substeps=REFERENCE_SUBSTEPS)
+        own, own_hits = follow('numpy', shot, 150)
+
+        own_apart = apart(fine, own)
+        if own_apart > TOLERANCE or own_hits != fine_hits:
+            agree = False
+
+        rows.append((number, len(reference), reference_hits or '-',
+                     same_hits or '-', '%.1e' % euler_apart,
+                     fine_hits or '-', '%.2f' % apart(fine, reference),
+                     own_hits or '-', '%.2f' % own_apart))
+
+    common.table(('shot', 'ticks', 'pymunk hits', 'euler hits',
+                  'euler apart px', 'fine pymunk hits', 'pymunk off px',
+                  'leapfrog hits', 'leapfrog off px'), rows)
+    print()
+    print('fine pymunk takes %d steps a tick, leapfrog must stay within '
+          '%.0f px of it.' % (REFERENCE_SUBSTEPS, TOLERANCE))
+
+    print()
+    common.table(('backend', 'energy drift over 60s orbit'), [
+        ('pymunk', '%.1e' % drift('pymunk')),
+        ('numpy euler', '%.1e' % drift('numpy', 'euler')),
+        ('numpy symplectic', '%.1e' % drift('numpy', 'symplectic')),
+        ('numpy leapfrog', '%.1e' % drift('numpy')),
+    ])
+    return agree
+
+def throughput():
+    rows = []
+    for count in (10, 100, 1000, 5000):
+        rand = random.Random(count)
+        shots = [(rand.uniform(0, 640), rand.uniform(0, 480),
+                  rand.uniform(-50, 50), rand.uniform(-50, 50))
+                 for _ in range(count)]
+
+        row = [count]
+        for name in ('pymunk', 'numpy'):
+            # no sensors to hit, so nobody drops out part way through.
+            backend, gravities, hits = world(name)
+            backend.remove(gravities)
+
+            # whole steps like pymunk, bench_substeps.py times substeps.
+            if name == 'numpy':
+                backend.max_substeps = 1
+            balls = launch(backend, shots)
+
+            ticks = 30
+            begin = time.time()
+            for _ in range(ticks):
+                tick(backend, balls, gravities)
+            taken = (time.time() - begin) / ticks
+            row.extend(['%.3f' % (taken * 1e3), '%d' % (count / taken)])
+        rows.append(row)
+
+    common.table(('balls', 'pymunk ms/tick', 'pymunk balls/s',
+                  'numpy ms/tick', 'numpy balls/s'), rows)
+
+def main():
+    if not forces.numpy:
+        print('numpy is not installed, there is only pymunk.')
+        return 0
+
+    agree = agreement()
+    print()
+    throughput()
+
+    if not agree:
+        print()
+        print('pymunk and the numpy backend disagree!')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Allocation tracking over 10000 shots.
+
+Plays LevelOne headless (see simulation.Simulation), firing one shot a frame
+across a fan of targets. Balls come and go the way they do in a game: spawned
+by shoot, killed when they hit something or the world bounds cull them, and
+handed back to their pool at the end of the frame. Reports how many objects
+the pools had to make and how many Python objects exist as the shots pile
+up.
+
+    python benchmarks/bench_pools.py
+
+Once the first SETTLE shots are in, the balls a pool has out or spare
+(made less destroyed) must not grow past what it was then, give or take
+SLACK, and neither must the Python objects, or this exits non zero.
+"""
+from __future__ import print_function
+
+import gc
+import random
+import sys
+import time
+
+import common
+
+import levels
+import simulation
+
+SHOTS = 10000
+REPORT_EVERY = 1000
+SETTLE = 2000
+
+# what the ball pool's size may wobble by, and the python object count.
+SLACK = 10
+OBJECT_SLACK = 0.02
+
+# aimed at in turn, from short lobs to straight at the vortex and beyond.
+TARGETS = [(200 + 40 * i, 150 + 25 * i) for i in range(12)]
+
+def main():
+    # nothing here wants a GL context.
+    try:
+        import pyglet
+        pyglet.options['shadow_window'] = False
+    except ImportError:
+        pass
+
+    random.seed(1)
+    sim = simulation.Simulation().init(levels=[levels.LevelOne])
+    pool = sim.pools['ball']
+    step = 1.0 / sim.physics_rate
+
+    rows = []
+    settled = None
+    grew = []
+    start = time.time()
+    for shot in range(1, SHOTS + 1):
+        # never run out, and keep playing past a won game.
+        sim.ballMeter.add(1)
+        x, y = TARGETS[shot % len(TARGETS)]
+        sim.turret.aim(x, y)
+        sim.shoot(x, y)
+        sim.tick(step)
+
+        if shot % REPORT_EVERY == 0:
+            gc.collect()
+            size = pool.created - pool.destroyed
+            objects = len(gc.get_objects())
+            rows.append((shot, pool.created, pool.reused, pool.destroyed,
+                         pool.live, pool.spare, objects,
+                         '%.3f' % ((time.time() - start) * 1e3 /
+                                   REPORT_EVERY)))
+            start = time.time()
+
+            if shot == SETTLE:
+                settled = size, objects
+            elif settled is not None:
+                if size > settled[0] + SLACK:
+                    grew.append('%d balls pooled at shot %d, %d at %d' % (
+                            size, shot, settled[0], SETTLE))
+                if objects > settled[1] * (1 + OBJECT_SLACK):
+                    grew.append('%d python objects at shot %d, %d at %d' % (
+                            objects, shot, settled[1], SETTLE))
+
+    common.table(('shots', 'balls made', 'reused', 'destroyed', 'live',
+                  'spare', 'python objects', 'ms/frame'), rows)
+
+    if grew:
+        print()
+        print('allocations kept growing after the first %d shots:' % SETTLE)
+        for line in grew:
+            print('   ', line)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
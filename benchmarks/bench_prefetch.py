@@ -0,0 +1,47 @@
+"""
+Time from picking a level to the game being ready, with nothing loaded
+beforehand versus after the menu's prefetch has run.
+
+    python benchmarks/bench_prefetch.py
+
+"""
+from __future__ import print_function
+
+import time
+
+import common
+
+import data
+import levels
+import schrocat
+
+def pick_level(window, prefetcher=None):
+    begin = time.time()
+    if prefetcher is not None:
+        prefetcher.finish()
+    window.init(levels=[levels.LevelOne])
+    window.on_draw()
+    return time.time() - begin
+
+def main():
+    window = schrocat.Schrocat(640, 480, visible=False)
+
+    data.cache.clear()
+    cold = pick_level(window)
+
+    # the menu would be up for a few seconds while this runs.
+    data.cache.clear()
+    prefetcher = schrocat.Schrocat.prefetcher().start()
+    while not prefetcher.done:
+        prefetcher.step()
+        time.sleep(1 / 60.0)
+    prefetched = pick_level(window, prefetcher)
+
+    common.table(('assets', 'ms to first frame'),
+                 [('not loaded', '%.2f' % (cold * 1000)),
+                  ('prefetched', '%.2f' % (prefetched * 1000))])
+    print('prefetch took %.2f ms in the background' % (prefetcher.took * 1000))
+    window.close()
+
+if __name__ == '__main__':
+    main()
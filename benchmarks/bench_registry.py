@@ -0,0 +1,62 @@
+"""
+Flat actor list versus the typed ActorRegistry, with thousands of live trail
+marks in play.
+
+Each simulated frame every ball looks up the gravities, a slice of the
+oldest trail marks die and as many new ones are laid.
+
+    python benchmarks/bench_registry.py
+
+"""
+from __future__ import print_function
+
+import itertools
+
+import common
+from registry import ActorRegistry
+
+class X(object): pass
+class Ball(object): pass
+class Gravity(object): pass
+
+def populate(actors, ntrails, nballs=10, ngravities=4):
+    for cls, n in ((Gravity, ngravities), (Ball, nballs), (X, ntrails)):
+        for _ in range(n):
+            actors.append(cls())
+    return actors
+
+def flat_frame(actors, dying):
+    for ball in [a for a in actors if a.__class__ == Ball]:
+        filter(lambda s: s.__class__.__name__ == 'Gravity', actors)
+
+    trails = [a for a in actors if a.__class__ == X][:dying]
+    for trail in trails:
+        actors.remove(trail)
+        actors.append(X())
+
+def registry_frame(actors, dying):
+    for ball in actors.of_type(Ball):
+        actors.of_type(Gravity)
+
+    trails = list(itertools.islice(actors.of_type(X), dying))
+    for trail in trails:
+        actors.remove(trail)
+        actors.append(X())
+
+def main():
+    rows = []
+    for ntrails in (1000, 5000, 10000):
+        dying = ntrails // 20
+        flat = populate([], ntrails)
+        typed = populate(ActorRegistry(), ntrails)
+
+        slow = common.best_of(lambda: flat_frame(flat, dying), number=3)
+        fast = common.best_of(lambda: registry_frame(typed, dying), number=3)
+        rows.append((ntrails, dying, '%.3f' % (slow * 1e3),
+                     '%.3f' % (fast * 1e3), '%.1fx' % (slow / fast)))
+
+    common.table(('live X', 'dying/frame', 'list ms', 'registry ms',
+                  'speedup'), rows)
+
+if __name__ == '__main__':
+    main()
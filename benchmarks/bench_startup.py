@@ -0,0 +1,53 @@
+"""
+Time from launching the game to its first frame.
+
+Starts the game a few times with --profile-startup, stops it once the menu
+is up and prints the best launch along with the breakdown from the last.
+
+    python benchmarks/bench_startup.py
+
+"""
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import time
+
+import common
+
+RUNS = 5
+
+def launch():
+    """Return (seconds from launch to first frame, profile output)."""
+    begin = time.time()
+    game = subprocess.Popen([sys.executable, '-u',
+                             os.path.join(common.ROOT, 'run_game.py'),
+                             '--profile-startup'],
+                            stdout=subprocess.PIPE, universal_newlines=True)
+
+    lines = []
+    for line in iter(game.stdout.readline, ''):
+        lines.append(line)
+        if line.startswith('startup:'):
+            break
+    taken = time.time() - begin
+
+    # give it a moment to finish the report, then close the game.
+    time.sleep(0.5)
+    game.terminate()
+    lines.append(game.communicate()[0])
+    return taken, ''.join(lines)
+
+def main():
+    runs = [launch() for _ in range(RUNS)]
+
+    common.table(('run', 'ms to first frame'),
+                 [(i + 1, '%.1f' % (taken * 1000))
+                  for i, (taken, output) in enumerate(runs)] +
+                 [('best', '%.1f' % (min(t for t, o in runs) * 1000))])
+    print()
+    print(runs[-1][1])
+
+if __name__ == '__main__':
+    main()
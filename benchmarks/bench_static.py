@@ -0,0 +1,72 @@
+"""
+Dynamic versus static vortex bodies.
+
+Runs LevelThree (4 vortexes) and a 50 vortex stress level with a few balls
+in flight, once with vortexes as heavy dynamic bodies (the old way) and once
+as static bodies, and reports the per-frame update and physics step cost.
+
+    python benchmarks/bench_static.py
+
+"""
+from __future__ import print_function
+
+import time
+
+import common
+
+import levels
+import schrocat
+
+FRAMES = 300
+BALLS = 20
+
+class StressLevel(levels.LevelThree):
+    """50 vortexes on a grid across the right of the screen."""
+
+    vortexes = [((0.4 + 0.06 * (i % 10), 0.2 + 0.15 * (i // 10)), 0.3, 0)
+                for i in range(50)]
+
+def run(window, level, static):
+    schrocat.Gravity.static = static
+    window.init(levels=[level])
+    window.turret.aim(400, 300)
+
+    for _ in range(BALLS):
+        window.ballMeter.add(1)
+        window._bullet(0, 0)
+    window.sync()
+
+    update = step = 0.0
+    for _ in range(FRAMES):
+        start = time.time()
+        window.update()
+        middle = time.time()
+        window.backend.step(1/30.0)
+        window.sync()
+        end = time.time()
+
+        update += middle - start
+        step += end - middle
+
+    return update * 1e3 / FRAMES, step * 1e3 / FRAMES
+
+def main():
+    window = schrocat.Schrocat(640, 480, visible=False)
+
+    rows = []
+    for level in (levels.LevelThree, StressLevel):
+        before = run(window, level, static=False)
+        after = run(window, level, static=True)
+        saved = sum(before) - sum(after)
+        rows.append((level.__name__, len(level.vortexes),
+                     '%.3f' % before[0], '%.3f' % before[1],
+                     '%.3f' % after[0], '%.3f' % after[1], '%.3f' % saved))
+
+    schrocat.Gravity.static = True
+    common.table(('level', 'vortexes', 'dynamic update ms', 'dynamic step ms',
+                  'static update ms', 'static step ms', 'saved ms/frame'),
+                 rows)
+    window.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Adaptive substeps against a finer global step, for balls skimming past a
+strong vortex core with the NumPy physics backend.
+
+    python benchmarks/bench_substeps.py
+
+Every run fires the same fan of balls past the core. The reference takes
+the 1/30s tick in 64 pieces for every ball. The rest are judged on how
+many balls hit the core or miss it the same as the reference did, and how
+far from the reference the misses end up after two seconds, worst of
+those that came within a ball's width or two of the core.
+
+Substeps must never go past MAX_SUBSTEPS for any ball, or this exits non
+zero.
+"""
+from __future__ import print_function
+
+import sys
+import time
+
+import common
+
+import actors
+import forces
+import physics
+from constants import BALL_TYPE, GRAVITY_TYPE, MAX_SUBSTEPS
+
+# pymunk 1.0 wants this before a space is made, see actors.Gravity.
+actors.init_pymunk()
+
+TICK = 1 / 30.0
+SECONDS = 2.0
+SHOTS = 200
+SPEED = 300
+
+# a vortex that has been hit a few times.
+STRENGTH = 1.0
+
+# the fan, LOW to LOW + SPREAD pixels off the core's middle.
+LOW = 20
+SPREAD = 130
+CLOSE = 98
+IMAGE = actors.NullImage(10, 10)
+
+def run(pieces, max_substeps):
+    """
+    Fly the fan for SECONDS, each tick split into pieces global steps and
+    each of those into max_substeps more per ball if needed.
+
+    Returns {ball: (tick hit or None, x, y)}, seconds taken and the backend.
+    """
+    backend = physics.NumpyBackend()
+    backend.max_substeps = max_substeps
+
+    well = actors.make_gravity(320, 240, None, IMAGE, backend)
+    well.strength = STRENGTH
+    backend.add([well])
+    gravities = [well]
+    backend.gravity = forces.puller(gravities)
+
+    hits = {}
+    backend.on_hit(BALL_TYPE, GRAVITY_TYPE,
+                   lambda ball, well: hits.setdefault(ball, ticks[0]))
+
+    # left to right, across the core.
+    balls = []
+    for number in range(SHOTS):
+        offset = LOW + SPREAD * float(number) / SHOTS
+        ball = actors.make_ball(60, 240 + offset, None, IMAGE, backend)
+        ball.velocity = (SPEED, 0)
+        ball.number = number
+        ball.close = offset < CLOSE
+        balls.append(ball)
+    backend.add(balls)
+
+    ticks = [0]
+    step = TICK / pieces
+    begin = time.time()
+    for ticks[0] in range(int(SECONDS / TICK)):
+        for _ in range(pieces):
+            flying = [one for one in balls if one not in hits]
+            if not flying:
+                break
+            backend.set_forces(flying, forces.pull(backend.state(flying),
+                                                   gravities))
+            backend.step(step)
+
+        # the game would kill them at the end of the tick.
+        gone = [one for one in balls if one in hits]
+        if gone:
+            backend.remove(gone)
+            balls = [one for one in balls if one not in hits]
+    taken = time.time() - begin
+
+    result = {}
+    for ball in balls:
+        result[ball.number] = (None, ball.x, ball.y, ball.close)
+    for ball, tick in hits.items():
+        result[ball.number] = (tick, None, None, ball.close)
+    return result, taken, backend
+
+def compare(result, reference):
+    """How many outcomes match, and the worst close miss distance."""
+    same = 0
+    worst = 0.0
+    for number, (tick, x, y, close) in reference.items():
+        other_tick, other_x, other_y, _ = result[number]
+        if (tick is None) == (other_tick is None):
+            same += 1
+        if tick is None and other_tick is None and close:
+            worst = max(worst, abs(x - other_x), abs(y - other_y))
+    return same, worst
+
+def main():
+    if not forces.numpy:
+        print('numpy is not installed, so there is no NumPy backend.')
+        return 0
+
+    reference, _, _ = run(64, 1)
+
+    rows = []
+    bounded = True
+    for name, pieces, max_substeps in (
+            ('global 1/30s', 1, 1),
+            ('adaptive 1/30s', 1, MAX_SUBSTEPS),
+            ('global 1/120s', 4, 1),
+            ('global 1/480s', 16, 1)):
+        result, taken, backend = run(pieces, max_substeps)
+        same, apart = compare(result, reference)
+        if backend.most_substeps > max(max_substeps, 1):
+            bounded = False
+
+        ball_ticks = int(SECONDS / TICK) * SHOTS
+        rows.append((name, '%d/%d' % (same, SHOTS), '%.2f' % apart,
+                     '%.1f' % (taken * 1e3), backend.most_substeps,
+                     '%.1f%%' % (100.0 * backend.substepped / ball_ticks)))
+
+    common.table(('steps', 'same hit or miss', 'worst close miss apart px',
+                  'ms for 2s', 'most substeps', 'ball steps split'), rows)
+
+    if not bounded:
+        print()
+        print('a ball took more than MAX_SUBSTEPS (%d) substeps!' %
+              MAX_SUBSTEPS)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
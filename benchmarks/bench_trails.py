@@ -0,0 +1,79 @@
+"""
+Sprite-per-dot X trails versus the array backed TrailSystem.
+
+A handful of balls fly in circles laying a dot each per frame, the way
+Ball.custom_update does. Needs a GL context, so a hidden window is opened.
+
+    python benchmarks/bench_trails.py
+
+"""
+from __future__ import print_function
+
+import math
+import time
+
+import common
+
+import pyglet
+
+import trails
+from schrocat import X, load_and_anchor
+
+FRAMES = 300
+
+def positions(nballs, frame):
+    for i in range(nballs):
+        angle = frame * 0.05 + i
+        yield 320 + math.cos(angle) * (50 + i * 10), 240 + math.sin(angle) * 100
+
+def run_x(nballs, image):
+    batch = pyglet.graphics.Batch()
+    live = []
+    start = time.time()
+    for frame in range(FRAMES):
+        for x, y in positions(nballs, frame):
+            trail = X(x, y, batch, image)
+            trail.minopacity = 1
+            trail.rate = 1.01
+            live.append(trail)
+
+        for trail in live:
+            trail.update()
+        dead = [t for t in live if t.opacity < t.minopacity]
+        for trail in dead:
+            live.remove(trail)
+        batch.draw()
+    return (time.time() - start) / FRAMES, len(live)
+
+def run_system(nballs, image):
+    batch = pyglet.graphics.Batch()
+    system = trails.TrailSystem(image, batch, rate=1.01)
+    start = time.time()
+    for frame in range(FRAMES):
+        for x, y in positions(nballs, frame):
+            system.emit(x, y)
+        system.update()
+        batch.draw()
+    return (time.time() - start) / FRAMES, system.live
+
+def main():
+    if not trails.numpy:
+        print('numpy is not installed, nothing to compare against.')
+        return
+
+    window = pyglet.window.Window(visible=False)
+    image = load_and_anchor('trail.png', 2, 2)
+
+    rows = []
+    for nballs in (1, 5, 10):
+        slow, sprites = run_x(nballs, image)
+        fast, dots = run_system(nballs, image)
+        rows.append((nballs, sprites, '%.2f' % (slow * 1e3), dots, 1,
+                     '%.2f' % (fast * 1e3)))
+
+    common.table(('balls', 'X sprites', 'X ms/frame', 'dots',
+                  'vertex lists', 'system ms/frame'), rows)
+    window.close()
+
+if __name__ == '__main__':
+    main()
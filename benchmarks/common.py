@@ -0,0 +1,36 @@
+"""
+Bits shared by the benchmark scripts.
+
+The game modules use plain (implicit relative) imports, so we put the
+teamstrong directory itself on the path and import them by name.
+
+"""
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'teamstrong'))
+
+def best_of(fn, repeat=5, number=10):
+    """Return the best average seconds per call of fn over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        for _ in range(number):
+            fn()
+        taken = (time.time() - start) / number
+        if best is None or taken < best:
+            best = taken
+    return best
+
+def table(header, rows):
+    """Print rows under a header, columns padded to line up."""
+    widths = [max(len(str(r[i])) for r in [header] + rows)
+              for i in range(len(header))]
+    line = '  '.join('%%%ds' % w for w in widths)
+    print(line % tuple(header))
+    for row in rows:
+        print(line % tuple(row))
@@ -0,0 +1,3 @@
+import teamstrong.simulation
+if __name__ == "__main__":
+    teamstrong.simulation.main()
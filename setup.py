@@ -6,6 +6,12 @@ import os
 # py2exe - build an exe
 # py2app - build an app
 # cx_freeze - build a linux binary (not implemented)
+# pack - pack the data dir into data/assets.pack, the binaries ship just that
+#        (and pack it afresh themselves, so a stale pack never ships)
+# atlas - pack the game sprites into data/atlas.png and data/atlas.json
+#
+# pack and the binaries build the sprite atlas first. That needs pyglet, so
+# sdist, build and install leave it alone.
 #
 # the goods are placed in the dist dir for you to .zip up or whatever...
 
@@ -99,7 +105,7 @@ import shutil
 try:
     cmd = sys.argv[1]
 except IndexError:
-    print 'Usage: setup.py install|py2exe|py2app|cx_freeze'
+    print 'Usage: setup.py install|py2exe|py2app|cx_freeze|pack|atlas'
     raise SystemExit
 
 # utility for adding subdirectories
@@ -117,6 +123,19 @@ def add_files(dest,generator):
             filename = os.path.join(dirpath, name)
             dest.append(filename)
 
+# the game modules, for the atlas and the pack.
+sys.path.insert(0, 'teamstrong')
+
+# pack the sprites into data/atlas.png and data/atlas.json before we look
+# at what is in data, see teamstrong/atlas.py.
+if cmd in ('atlas', 'pack', 'py2exe', 'py2app', 'cx_freeze'):
+    import atlas
+    width, height = atlas.build()
+    print 'packed %d sprites into a %dx%d atlas' % (len(atlas.SPRITES),
+                                                    width, height)
+    if cmd == 'atlas':
+        raise SystemExit
+
 # define what is our data
 _DATA_DIR = 'data'
 data = []
@@ -129,6 +148,17 @@ add_files(data,os.walk(_DATA_DIR))
 data_dirs = [os.path.join(f2.replace(_DATA_DIR, 'data')) for f2 in data]
 PACKAGEDATA['package_data'] = {'teamstrong': data_dirs}
 
+# every data file in one, see teamstrong/assetpack.py
+_PACK = os.path.join(_DATA_DIR, 'assets.pack')
+if cmd in ('pack', 'py2exe', 'py2app', 'cx_freeze'):
+    import assetpack
+    names = assetpack.write(_PACK, _DATA_DIR,
+                            [os.path.relpath(f, _DATA_DIR) for f in data
+                             if f != _PACK])
+    print 'packed %d files into %s' % (len(names), _PACK)
+    if cmd == 'pack':
+        raise SystemExit
+
 
 
 
@@ -231,9 +261,10 @@ def make_dirs(dname_):
         if not os.path.isdir(dname):
             os.mkdir(dname)
 
-# copy data into the binaries 
+# copy data into the binaries, just the pack we made above
 if cmd in ('py2exe','cx_freeze','py2app'):
     dest = data_dir
+    data = [_PACK] + [f for f in data if not f.startswith(_DATA_DIR)]
     for fname in data:
         dname = os.path.join(dest,os.path.dirname(fname))
         make_dirs(dname)
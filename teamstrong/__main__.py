@@ -1,15 +1,18 @@
 import platform
 platform.release = lambda:"10.6.5"
-import data
+import sys
 
-from schrocat import Schrocat
-
-from levels import LevelOne
-import ui
+import profiling
 
 def main():
     """ your app starts here
     """
+    if '--profile-startup' in sys.argv:
+        profiling.start_startup_profile()
 
+    # the menu pulls in pyglet, pymunk and the rest, only import it now.
+    import ui
+    ui.main()
 
-    #Schrocat(levels=[LevelOne]).main_loop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,763 @@
+"""
+Game actors
+===========
+
+Everything that lives in a game of Schrocat: the physics objects (balls,
+vortexes, the cat), the turret and the meters keeping score.
+
+Actors draw through pyglet sprites in a batch. Give them no batch and they
+get a NullSprite instead, which keeps track of where it would be drawn and
+does nothing else, so a game can be simulated without a window or any
+textures (see simulation).
+
+example of use:
+
+    ball = make_ball(x, y, batch, images['ball'], backend)
+
+    # headless.
+    ball = make_ball(x, y, None, NullImage(10, 10), backend)
+
+Physics goes through a backend (see physics), pymunk or numpy.
+"""
+import random
+import math
+import time
+
+import pymunk
+
+import forces
+
+from constants import DEFAULT_TYPE, BALL_TYPE, GRAVITY_TYPE, CAT_TYPE
+from constants import ALL_LAYERS, BALL_LAYER, GRAVITY_LAYER, CAT_LAYER
+from signals import signal
+from utils import clip, get_or_setdefault, make_rotator
+
+#---------------------------------------------------------------------
+# Sprites, or not.
+
+class NullImage(object):
+    """The size and anchor of an image, without any pixels."""
+
+    def __init__(self, width, height, anchor_x=0, anchor_y=0):
+        self.width, self.height = width, height
+        self.anchor_x, self.anchor_y = anchor_x, anchor_y
+
+class NullSprite(object):
+    """
+    Stands in for a pyglet Sprite when there is nothing to draw to. Keeps
+    every attribute the game sets on its sprites, draws nothing.
+
+    """
+
+    def __init__(self, image, batch=None):
+        self.image = image
+        self.x = self.y = 0
+        self.rotation = 0
+        self.scale = 1.0
+        self.opacity = 255
+        self.color = (255, 255, 255)
+        self.visible = True
+
+    @property
+    def position(self):
+        return self.x, self.y
+
+    @position.setter
+    def position(self, x_y):
+        self.x, self.y = x_y
+
+    def set_position(self, x, y):
+        self.x, self.y = x, y
+
+    @property
+    def width(self):
+        return self.image.width * self.scale
+
+    @property
+    def height(self):
+        return self.image.height * self.scale
+
+    def delete(self):
+        pass
+
+def make_sprite(image, batch):
+    """A pyglet Sprite of image in batch, or a NullSprite if no batch."""
+    if batch is None:
+        return NullSprite(image)
+
+    import pyglet
+    return pyglet.sprite.Sprite(image, batch=batch)
+
+#---------------------------------------------------------------------
+# Game objects.
+
+class PhysicsElem(object):
+    """An object that is Physics aware."""
+
+    # collision_type and layers given to our shape. Sensors report contacts
+    # without ever pushing anything about.
+    collision = DEFAULT_TYPE
+    layers = ALL_LAYERS
+    sensor = False
+
+    # touch sensors with a circle this big rather than our own shape, 0 to
+    # touch them with just our middle. None is our own shape.
+    sensor_radius = None
+
+    # static things never move. The solver leaves them alone and so do we.
+    static = False
+
+    def __init__(self, mass, radius, x, y, batch, image, backend):
+
+        self.mass = mass
+        self.radius = radius
+        self.backend = backend
+
+        self.image = make_sprite(image, batch)
+        self.image.position = self._drawn_at = self._last = (x, y)
+
+        self._build(x, y, radius)
+
+    def _build(self, x, y, radius):
+        """Make a fresh body and shape for us at x, y."""
+        self.body, self.shape = self.backend.circle(self, x, y, self.mass,
+                                                    radius)
+
+    @property
+    def physics(self):
+        """
+        The body and shape to add to or remove from the backend. A static
+        body is never added, only its shape.
+
+        """
+        if self.static:
+            return (self.shape,)
+        return self.body, self.shape
+
+    def grow(self, fraction):
+        """
+        grow the size of the image and the shape by a fraction.
+
+        """
+        self.image.scale += fraction
+        radius = self.radius * math.sqrt(fraction)
+
+        self.backend.remove([self])
+        self._build(self.x, self.y, radius)
+        self.backend.add([self])
+
+    def reset(self, x, y):
+        """Fresh out of the pool, put us at x, y and stand still."""
+        body = self.body
+        body.position = x, y
+        body.velocity = (0, 0)
+        body.angular_velocity = 0
+        self.force = (0, 0)
+
+        self.image.position = self._drawn_at = self._last = (x, y)
+        self.image.visible = True
+
+    def retire(self):
+        """Back in the pool, hide until needed again."""
+        self.image.visible = False
+
+    def destroy(self):
+        self.image.delete()
+
+    @property
+    def x(self):
+        return self.body.position.x
+
+    @property
+    def y(self):
+        return self.body.position.y
+
+    @property
+    def velocity(self):
+        return self.body.velocity
+
+    @velocity.setter
+    def velocity(self, value):
+        self.body.velocity = value
+
+    @property
+    def force(self):
+        return self.body.force
+
+    @force.setter
+    def force(self, value):
+        self.body.force = value
+
+    def hit(self, other):
+        """Returns True if this x, y pair is inside the other."""
+        return (self.x, self.y) in other
+
+    @property
+    def collision_type(self):
+        return self.shape.collision_type
+
+    @collision_type.setter
+    def collision_type(self, value):
+        self.shape.collision_type = value
+
+    def snapshot(self):
+        """Remember where we were before the physics step."""
+        position = self.body.position
+        self._last = (position.x, position.y)
+
+    def render(self, alpha):
+        """
+        convert body.position co-ords to self.image.x and y coords, alpha of
+        the way from where we were before the last step. Only touches the
+        sprite if that has changed since we last did.
+
+        """
+        if self.static:
+            return
+
+        position = self.body.position
+        lastx, lasty = self._last
+        x_y = (lastx + (position.x - lastx) * alpha,
+               lasty + (position.y - lasty) * alpha)
+        if x_y != self._drawn_at:
+            self.image.position = self._drawn_at = x_y
+
+    def update(self):
+        self.custom_update()
+
+    def custom_update(self):
+        """
+        Override this to add custom functionality in update.
+        """
+        pass
+
+    def __contains__(self, x_y):
+        return self.shape.point_query(x_y)
+
+
+class Ball(PhysicsElem):
+    """A ball shot from a cannon."""
+
+    collision = BALL_TYPE
+    layers = BALL_LAYER
+
+    # a hit is our middle inside a vortex core or the cat, like it always
+    # was, not any part of us touching.
+    sensor_radius = 0
+
+    def custom_update(self):
+        """
+        Find the net force from all of the gravities to me! (unless the
+        parent has already worked it out for every ball at once)
+
+        Hitting a cat or a vortex is the backend's job, see
+        Simulation.ball_hit_vortex and Simulation.ball_hit_cat.
+
+        also lay a trail as we go.
+        """
+        if not self.parent.batched_forces:
+            self.force = forces.net_force_on(self, self.parent.gravities)
+
+        # leave a trail but only if we are on the screen.
+        onscreen = self.parent.onscreen(self.x, self.y)
+        self.parent.actors.set_onscreen(self, onscreen)
+        if not onscreen:
+            return
+
+        if self.parent.trails is not None:
+            self.parent.trails.emit(self.x, self.y, now=self.parent.sim_time)
+            return
+
+        # nobody to see a trail when we are headless.
+        pool = self.parent.pools.get('trail')
+        if pool is None:
+            return
+
+        trail = pool.acquire(self.x, self.y)
+        trail.minopacity = 1
+        trail.rate = 1.01
+        self.parent.spawn(trail)
+            
+class Gravity(PhysicsElem):
+    """A gravitational well."""
+
+    collision = GRAVITY_TYPE
+    layers = GRAVITY_LAYER
+    sensor = True
+    static = True
+
+    def __init__(self, mass, radius, x, y, batch, image, backend):
+        PhysicsElem.__init__(self, mass, radius, x, y, batch, image, backend)
+        self._strength = 0.1
+
+    def reset(self, x, y):
+        # shrink back down if a ball made us grow.
+        if self.image.scale != 1:
+            self.image.scale = 1
+            self._build(x, y, self.radius)
+
+        PhysicsElem.reset(self, x, y)
+        self._strength = 0.1
+
+    def hitbyball(self, gravity, ball):
+        """
+        A callback method that takes the gravity that was hit, and
+        the ball that hit it.
+
+        """
+        # check, was I the gravity that was hit?
+        if not gravity is self:
+            return
+
+        # I have been hit by a ball, need to upgrade my strength.
+        # and mabbe get a bit bigger.
+        self.strength = self.strength + 0.2
+        self.grow(0.2)
+
+    @property
+    def strength(self):
+        return self._strength
+
+    @strength.setter
+    def strength(self, value):
+        self._strength = value
+
+    def custom_update(self):
+        """
+        Update rotation so that it is always spinning.
+
+        """
+        # gravity will spin in a random direction for visual gags.
+        direction = get_or_setdefault(self, '_direction',
+                                            random.choice([3, -3]))
+
+        rotator = get_or_setdefault(self, '_rotator',
+                                            make_rotator(direction))
+
+        self.image.rotation = rotator.next()
+
+    def force_on(self, obj):
+        """
+        Returns the force on an object that defines x and y properties.
+
+        """
+        return forces.force_on(self, obj)
+
+class Cat(object):
+
+    # our sensor box, see PhysicsElem.
+    collision = CAT_TYPE
+    layers = CAT_LAYER
+    sensor = True
+
+    def __init__(self, x, y, batch, body, head, backend):
+        self.x, self.y = x,y
+
+        self.body = make_sprite(body, batch)
+        self.head = make_sprite(head, batch)
+
+        self.getHeadTilt = make_rotator(lim_left=-10, lim_right=10)
+
+        # a sensor box the size of the cat's body. Its body never goes in
+        # the backend, we move it ourselves when the cat moves.
+        halfW = body.width / 2.0
+        halfH = body.height / 2.0
+        self.half_width, self.half_height = halfW, halfH
+        self.sensor_body, self.shape = backend.box(self, x, y, halfW, halfH)
+
+    @property
+    def physics(self):
+        return (self.shape,)
+
+    def update(self):
+        """
+        Updates the head.. 
+        """
+        self.body.x, self.body.y = self.x , self.y
+        self.head.x, self.head.y = self.x - 6 , self.y + 10 
+        self.head.rotation = self.getHeadTilt.next()
+
+    def hit(self, other):
+        """Returns True if this x, y pair is inside the other."""
+        return (self.x, self.y) in other
+
+    def swept(self, start, end, radius=0.0):
+        """
+        True if a circle of radius going in a straight line from start to
+        end touches our box on the way. The sensor only sees where a ball
+        is after each step, a fast one could jump clean over us.
+
+        Corners count as square, a hair more than the sensor would.
+        """
+        low, high = 0.0, 1.0
+        for begin, finish, middle, half in (
+                (start[0], end[0], self.x, self.half_width + radius),
+                (start[1], end[1], self.y, self.half_height + radius)):
+            delta = float(finish - begin)
+            if not delta:
+                if abs(begin - middle) > half:
+                    return False
+                continue
+
+            # when we cross into and out of the box along this axis.
+            enter = (middle - half - begin) / delta
+            leave = (middle + half - begin) / delta
+            if enter > leave:
+                enter, leave = leave, enter
+            low, high = max(low, enter), min(high, leave)
+            if low > high:
+                return False
+        return True
+
+    def move(self):
+        """I got hit, the jig is up. time to move on."""
+        x, y = self.parent.level.next_cat
+        width, height = self.parent.get_size()
+        self.x, self.y = x * width, y * height
+        self.sensor_body.position = self.x, self.y
+
+    def __contains__(self, x_y):
+        x, y = x_y
+        halfW = self.body.width / 2
+        halfH = self.body.height / 2
+        within_x = self.body.x - halfW < x and x < self.body.x + halfW
+        within_y = self.body.y - halfH < y and y < self.body.y + halfH
+
+        return within_x and within_y
+
+class X(object):
+    def __init__(self, x, y, batch, image, opacity=255):
+        self.image = make_sprite(image, batch)
+        self.reset(x, y, opacity)
+
+    def reset(self, x, y, opacity=255):
+        self.image.opacity = opacity
+        self.image.position = (x, y)
+        self.image.visible = True
+        self.x, self.y = x, y
+        self.opacity = opacity
+        self.minopacity = 1
+        self.rate = 1.005
+        self.seconds_to_live = 10
+        self.created_at = time.time()
+
+    def retire(self):
+        self.image.visible = False
+
+    def destroy(self):
+        self.image.delete()
+
+    def update(self):
+        self.opacity = self.opacity / self.rate
+        self.image.opacity = int(self.opacity)
+
+        if self.opacity < self.minopacity:
+            signal('kill', self)
+        elif time.time() - self.created_at > self.seconds_to_live:
+            signal('kill', self)
+
+
+class PowerBar(object):
+    def __init__(self, image, batch, nBars, smallWid, bigWid):
+        self.nBars = nBars
+        self.sprites = []
+        for i in range(nBars):
+            self.sprites.append(make_sprite(image, batch))
+        
+        # scaling required to get the first bar to be 'bigWid'
+        bigScale = float(bigWid) / self.sprites[0].width
+        smallScale = float(smallWid) / self.sprites[0].width
+        
+        smallCol = (0,0,255) #blue
+        bigCol = (255,0,0) #red
+        
+        def colMix(col1, col2, ratio):
+            """
+            Linear interpolation between col1 and col2
+            """
+            r = int(ratio * (col1[0] - col2[0])) + col2[0]
+            g = int(ratio * (col1[1] - col2[1])) + col2[1]
+            b = int(ratio * (col1[2] - col2[2])) + col2[2]
+            return (r, g, b)
+        
+        colorStep = 1.0 /(nBars -1)
+        currColor = 1.0
+        scaleStep = (bigScale - smallScale) / (nBars-1)
+        currScale = smallScale
+        self.barOffsets = []
+        currHeight = 0
+        # start from small to large bar
+        for sprite in self.sprites:
+            sprite.scale = currScale
+            # set scale for the next step.
+            currScale += scaleStep
+
+            self.barOffsets.append(currHeight)
+            # set height for next bar.
+            currHeight += sprite.height
+
+            sprite.color = colMix(smallCol, bigCol, currColor)
+            # set colour ratio for the next bar.
+            currColor -= colorStep
+
+            sprite.visible = False
+            
+
+        
+    def updatePos(self, x, y, rot, direction=None):
+        """
+        Move all of the bars so the stay in formation
+
+        direction is (sin, cos) of rot if the caller already knows it.
+        """
+        if direction is None:
+            direction = (math.sin(math.radians(rot)),
+                         math.cos(math.radians(rot)))
+        sin, cos = direction
+
+        for sprite, offset in zip(self.sprites, self.barOffsets):
+            sprite.set_position(x + sin * offset, y + cos * offset)
+            sprite.rotation = rot
+
+    def updatePower(self, power):
+        """
+        This draws the different bars of the powerBar with varying opacity.
+
+        For instance, if there are four bars, then the power rating will be
+        split into 4 sections, 0-25, 25-50 etc. Only the first bar will be 
+        visible if the power is in the first band. Its opacity (out of a
+        max set by maxOpac) will be relative to its magnitude in this range; 
+        section 2 will barely be visible if the power is 28% but almost
+        completly opaque when approaching 50%.
+
+        """
+        maxOpac = 200
+        bandSize = 1.0 / self.nBars
+        for i, sprite in enumerate(self.sprites):
+            # divide the power bars into sections. ie. if there are 4 bars
+            # and power is only .20 then only the first bar is visible and
+            # only (.20/.25) of the max oppacity
+            if power < float(i) / self.nBars:
+                # underpowered :(
+                sprite.visible = False
+            elif power < (float(i) + 1) /self.nBars:
+                # power in this section
+                sprite.visible = True
+                # opac = maxOpac * ( amount past threshold / size of band)
+                sprite.opacity = int(maxOpac * 
+                                    (power - (float(i)) /self.nBars) /
+                                    bandSize)
+            else:
+                # Over powered!!!
+                sprite.visible = True
+                sprite.opacity = maxOpac
+
+        
+
+class Turret(object):
+    length = 60
+
+    def __init__(self, x, y, batch, frame, barrel):
+        self.x, self.y = x,y
+
+        # create sprites for the turret from images
+        self.barrel = make_sprite(barrel, batch) 
+        self.frame = make_sprite(frame, batch) 
+
+        # sin and cos of the barrel rotation, worked out once per aim.
+        self.direction = (0.0, 1.0)
+
+        
+    def initPowerBar(self, image, batch, nBars, smallWid, bigWid):
+        self.powerBar = PowerBar(image, batch, nBars, smallWid, bigWid)
+
+    def aim(self, x, y):
+        # this could possible be simpler, i don't like trig much :( 
+        rotation = (math.degrees(math.atan2(self.x-x, self.y-y)) + 180) % 360
+        
+        if rotation > 90 and rotation < 270:
+            if rotation < 180:
+                rotation = 90
+            else: rotation = 270
+
+        self.barrel.rotation = rotation
+        radians = math.radians(rotation)
+        self.direction = (math.sin(radians), math.cos(radians))
+
+        # update power and other things to do with the aim.    
+        self.updatePower(x, y)
+        self.powerBar.updatePower(self.power)
+        xTip, yTip = self.tip
+        self.powerBar.updatePos(xTip, yTip, rotation, self.direction)
+
+    def updatePower(self, x, y):
+        """
+        Compute the power!!!
+
+        Measured as the distance from the tip of the turret.
+        """
+        refDist = 250.0
+        xTip, yTip = self.tip
+        # Velocity is dependent on the distance the pointer is from the turret.
+        self.power = math.hypot(x - xTip, y - yTip) / refDist
+        self.power = clip(1.0, 0.05)(self.power)
+
+
+    @property
+    def tip(self):
+        """
+        Return the x, y co-ordinates of the tip of the barrel.
+        Uses an estimated length of the barrel based on size of the image.
+
+        """
+        # theta in degrees clockwise from vertical.
+        sin, cos = self.direction
+
+        # x + delta_x = x + sin(theta) * L
+        x = self.x + sin * self.length
+        y = self.y + cos * self.length
+        return x, y
+
+    @property
+    def rotation(self):
+        """return rotation in radians."""
+        return math.radians(self.barrel.rotation)
+
+    def update(self):
+        # just in case the turret ever needs to move
+        self.frame.x, self.frame.y = self.x, self.y
+        self.barrel.x, self.barrel.y = self.x, self.y
+
+    def draw(self):
+        # sprites are drawn directly by the batch
+        pass
+
+#----------------------------------------------------------
+# Object factory functions.
+
+def make_ball(x, y, batch, image, backend, mass=1, radius=5):
+    return Ball(mass, radius, x, y, batch, image, backend)
+
+def make_gravity(x, y, batch, image, backend, mass=1e6, radius=25):
+    return Gravity(mass, radius, x, y, batch, image, backend)
+
+def make_x(x, y, batch, image):
+    return X(x, y, batch, image)
+
+#-----------------------------------------------------------
+# Interface objects.
+
+class Meter(object):
+    """
+    Points shown as a bar in the HUD batch. The bar is only touched when
+    the points change.
+
+    """
+
+    def __init__(self, x, y, width, height,
+                 minColor, maxColor, maxPoints,
+                 initPoints=None, gradient=False, visible=True, batch=None):
+
+        self.x, self.y = x,y
+        self.width, self.height = width, height
+        self.maxPoints = maxPoints
+        self.minColor, self.maxColor = minColor, maxColor
+        self.points = initPoints or maxPoints
+
+        # a fraction of 1, despite pc (percent)
+        self.pointpc = 0.0 
+        self.color = (1.0, 1.0, 1.0)
+
+        self.gradient = gradient
+
+        self.gauge = None
+        if batch is not None:
+            from hud import Gauge
+            self.gauge = Gauge(x, y, width, height, batch, visible=visible)
+
+        self.update()
+
+    @property
+    def top(self):
+        return self.y + self.height*self.pointpc
+
+    @property
+    def bottom(self):
+        return self.y
+
+    @property
+    def left(self):
+        return self.x
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def active(self):
+        """So long as this baby has 'points' it is active."""
+        return self.points
+
+    def update(self):
+        # get points as percentage of maximum
+        self.pointpc = float(self.points) / self.maxPoints
+
+        # produce intermediate color
+        pointpc, inverse = self.pointpc, 1 - self.pointpc
+        self.color = (
+                self.minColor[0] * inverse +
+                self.maxColor[0] * pointpc,
+
+                self.minColor[1] * inverse +
+                self.maxColor[1] * pointpc,
+
+                self.minColor[2] * inverse +
+                self.maxColor[2] * pointpc)
+
+        # not sure if necessary, but in case of rounding errors            
+        self.color = tuple(map(clip(1, 0), self.color))
+
+        if self.gauge is not None:
+            bottom_color = self.minColor if self.gradient else self.color
+            self.gauge.set(fraction=self.pointpc, color=self.color,
+                           bottom_color=bottom_color)
+
+    @property
+    def visible(self):
+        return self.gauge is not None and self.gauge.visible
+
+    @visible.setter
+    def visible(self, visible):
+        if self.gauge is not None:
+            self.gauge.visible = visible
+
+    def add(self, qty=1):
+        """
+        Add qty to points, but clip at maxPoints.
+
+        """
+        points = min(self.points + qty, self.maxPoints)
+        if points != self.points:
+            self.points = points
+            self.update()
+
+    def remove(self, qty=1):
+        """
+        Return the number of points after removing qty points.
+
+        Python treats any number of points other than 0 to be True.
+        """
+        points = max(self.points - qty, 0)
+        if points != self.points:
+            self.points = points
+            self.update()
+        return self.points
+
+_pymunk_ready = False
+
+def init_pymunk():
+    """pymunk.init_pymunk, once."""
+    global _pymunk_ready
+    if not _pymunk_ready:
+        pymunk.init_pymunk()
+        _pymunk_ready = True
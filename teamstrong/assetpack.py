@@ -0,0 +1,214 @@
+"""
+Asset pack
+==========
+
+Every data file in one, so a bundled game ships (and opens) a single file
+instead of hundreds.
+
+A pack is a header, an index and then the files back to back:
+
+    magic, number of files,
+    for each file: name length, name, offset, length, crc32,
+    file data..
+
+Names are paths relative to the data directory with '/' between the parts.
+At runtime the pack is memory mapped and files come out as slices of the
+mapping, no reading or copying until somebody looks at the bytes. The first
+time a file is looked at its crc32 is checked, a damaged pack raises
+ValueError rather than handing out garbage.
+
+example of use:
+
+    write('data/assets.pack', 'data')
+
+    pack = AssetPack('data/assets.pack')
+    pixels = pack.view('ball.png')     # zero copy
+    f = pack.open('theme.json')        # a file object, for the decoders
+
+The decoders (pyglet's image codecs, json) want a file to read(), not a
+buffer, so they get a PackedFile over the view. That copies what is read and
+nothing else: reading a PNG header takes 24 bytes out of the mapping, not the
+whole image, and a file nobody reads is never copied at all. A decoder that
+reads the lot still gets its own copy of the lot, there is no way around
+that short of the decoder taking a buffer.
+"""
+import io
+import mmap
+import os
+import struct
+import zlib
+
+MAGIC = b'TSPACK01'
+
+# magic, number of files.
+HEADER = struct.Struct('<8sI')
+
+# after each name: offset, length, crc32.
+ENTRY = struct.Struct('<QQI')
+NAME = struct.Struct('<H')
+
+def crc32(data):
+    return zlib.crc32(data) & 0xffffffff
+
+def _slice(mapped, offset, length):
+    try:
+        return memoryview(mapped)[offset:offset + length]
+    except TypeError:
+        # python 2's mmap only has the old style buffer interface.
+        return buffer(mapped, offset, length)
+
+def write(path, root, names=None):
+    """
+    Pack files under the root directory into path. names are paths relative
+    to root, every file under root (bar the pack itself) if not given.
+
+    Returns the list of names packed.
+    """
+    if names is None:
+        names = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                full = os.path.join(dirpath, filename)
+                if os.path.abspath(full) != os.path.abspath(path):
+                    names.append(os.path.relpath(full, root))
+        names.sort()
+    names = [name.replace(os.sep, '/') for name in names]
+
+    blobs = []
+    for name in names:
+        with open(os.path.join(root, *name.split('/')), 'rb') as f:
+            blobs.append(f.read())
+
+    encoded = [name.encode('utf-8') for name in names]
+    offset = HEADER.size + sum(NAME.size + len(e) + ENTRY.size
+                               for e in encoded)
+
+    partial = path + '.tmp'
+    with open(partial, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(names)))
+        for e, blob in zip(encoded, blobs):
+            f.write(NAME.pack(len(e)))
+            f.write(e)
+            f.write(ENTRY.pack(offset, len(blob), crc32(blob)))
+            offset += len(blob)
+        for blob in blobs:
+            f.write(blob)
+
+    if os.name == 'nt' and os.path.exists(path):
+        os.remove(path)
+    os.rename(partial, path)
+    return names
+
+class PackedFile(io.RawIOBase):
+    """
+    A read only file over the bytes of one packed file. Reads copy straight
+    from the mapping into the caller's buffer.
+    """
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        start = self._position
+        data = self._view[start:start + len(b)]
+        b[:len(data)] = data
+        self._position = start + len(data)
+        return len(data)
+
+    def readall(self):
+        # in one go, rather than the default's chunks joined together.
+        data = bytes(self._view[self._position:])
+        self._position += len(data)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+class AssetPack(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+
+        with open(path, 'rb') as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count = HEADER.unpack(self._mapped[:HEADER.size])
+        if magic != MAGIC:
+            raise ValueError('%s is not an asset pack' % path)
+
+        # name: (offset, length, crc32)
+        self.index = {}
+        position = HEADER.size
+        for _ in range(count):
+            (size,) = NAME.unpack(self._mapped[position:position + NAME.size])
+            position += NAME.size
+            name = self._mapped[position:position + size].decode('utf-8')
+            position += size
+            self.index[name] = ENTRY.unpack(
+                    self._mapped[position:position + ENTRY.size])
+            position += ENTRY.size
+
+        # names whose checksum has been checked already.
+        self._checked = set()
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def names(self):
+        return sorted(self.index)
+
+    def view(self, name):
+        """Return the bytes of a file as a zero copy slice of the pack."""
+        offset, length, crc = self.index[name]
+        data = _slice(self._mapped, offset, length)
+        if name not in self._checked:
+            if crc32(data) != crc:
+                raise ValueError('%s in %s is damaged' % (name, self.path))
+            self._checked.add(name)
+        return data
+
+    def open(self, name):
+        """
+        Return a file object for a packed file. The decoders want to read()
+        a file, so this is where bytes get copied out of the mapping, but
+        only the ones read. See PackedFile.
+        """
+        return PackedFile(self.view(name))
+
+    def stamp(self, name):
+        """Something that changes whenever this file's contents might have."""
+        offset, length, crc = self.index[name]
+        return self.mtime, length
+
+    def verify(self):
+        """Return the names of any files whose checksum doesn't match."""
+        damaged = []
+        for name in self.names():
+            offset, length, crc = self.index[name]
+            if crc32(_slice(self._mapped, offset, length)) != crc:
+                damaged.append(name)
+            else:
+                self._checked.add(name)
+        return damaged
+
+    def close(self):
+        self._mapped.close()
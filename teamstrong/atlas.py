@@ -0,0 +1,159 @@
+"""
+Sprite atlas
+============
+
+Packs every game sprite into one texture so the whole sprite batch draws
+without switching textures, and so a level loads with one image decode.
+
+The atlas is prebaked and never committed. setup.py builds it for pack and
+the binaries (py2exe, py2app, cx_freeze), or build it by hand (again,
+whenever a sprite changes) with:
+
+    python teamstrong/atlas.py
+
+which writes data/atlas.png and a data/atlas.json index of where each
+sprite is and where its anchor sits. If there is no atlas the sprites are
+loaded one file at a time like they always were.
+"""
+from __future__ import print_function
+
+import json
+
+import data
+
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_INDEX = 'atlas.json'
+
+# pixels left clear around each sprite so filtering doesn't bleed.
+PADDING = 1
+
+# tuple: (name, filename, anchor_x, anchor_y)
+#   anchors are fractions of the sprite size, 2 means halfway.
+SPRITES = [
+        ('ball', 'ball.png', 2, 2),
+        ('frame', 'blueturret_00.png', 2, 2),
+        ('barrel', 'bluebarrel_00.png', 2, 4),
+        ('cathead', 'cathead.png', 2, 3),
+        ('catbody', 'catbody.png', 2, 2),
+        ('gravity', 'gravity.png', 2, 2),
+        ('x', 'x.png', 2, 2),
+        ('trail', 'trail.png', 2, 2),
+        ('powerbar', 'powerbar.png', 2, 2),
+]
+
+def _power_of_two(n):
+    size = 1
+    while size < n:
+        size *= 2
+    return size
+
+def pack(sizes, width):
+    """
+    Shelf pack (width, height) sizes into a strip width pixels wide,
+    tallest first.
+
+    Returns a list of (x, y) positions in the same order as sizes and the
+    total height used.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        w, h = w + 2 * PADDING, h + 2 * PADDING
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        positions[i] = (x + PADDING, y + PADDING)
+        x += w
+        shelf = max(shelf, h)
+
+    return positions, y + shelf
+
+def build(sprites=SPRITES):
+    """Pack the sprites into the atlas image and write its index."""
+    import pyglet
+
+    images = [pyglet.image.load(data.filepath(filename))
+              for (name, filename, ax, ay) in sprites]
+    sizes = [(image.width, image.height) for image in images]
+
+    width = _power_of_two(max(w for w, h in sizes) + 2 * PADDING)
+    width = max(width, _power_of_two(int(sum(w * h for w, h in sizes) ** 0.5)))
+    positions, height = pack(sizes, width)
+    height = _power_of_two(height)
+
+    pixels = bytearray(width * height * 4)
+    regions = {}
+    for (name, filename, ax, ay), image, (x, y) in zip(sprites, images,
+                                                        positions):
+        w, h = image.width, image.height
+        rows = image.get_data('RGBA', w * 4)
+        for row in range(h):
+            start = ((y + row) * width + x) * 4
+            pixels[start:start + w * 4] = rows[row * w * 4:(row + 1) * w * 4]
+
+        regions[name] = {
+            'x': x, 'y': y, 'width': w, 'height': h,
+            'anchor_x': w // ax, 'anchor_y': h // ay,
+        }
+
+    atlas = pyglet.image.ImageData(width, height, 'RGBA', bytes(pixels))
+    atlas.save(data.filepath(ATLAS_IMAGE))
+
+    with open(data.filepath(ATLAS_INDEX), 'w') as f:
+        json.dump({'image': ATLAS_IMAGE, 'regions': regions}, f,
+                  indent=4, sort_keys=True)
+
+    return width, height
+
+def load():
+    """
+    Return a dict of name: texture region for every sprite in the atlas,
+    or None if it hasn't been built.
+
+    Only the first call reads anything, see data.cache.
+    """
+    return data.cache.get(('atlas', data.filepath(ATLAS_INDEX)), _load)
+
+def _load():
+    if not data.exists(ATLAS_INDEX):
+        return None
+
+    index = json.load(data.load(ATLAS_INDEX, 'r'))
+    texture = data.texture(index['image'])
+
+    images = {}
+    for name, r in index['regions'].items():
+        region = texture.get_region(r['x'], r['y'], r['width'], r['height'])
+        region.anchor_x, region.anchor_y = r['anchor_x'], r['anchor_y']
+        images[name] = region
+    return images
+
+def files(use_atlas=True):
+    """
+    Return the image files load_sprites will want: just the atlas if it
+    has been built, otherwise every loose sprite.
+
+    """
+    if use_atlas and data.exists(ATLAS_INDEX):
+        index = json.load(data.load(ATLAS_INDEX, 'r'))
+        return [index['image']]
+    return [filename for (name, filename, ax, ay) in SPRITES]
+
+def load_sprites(load_and_anchor, use_atlas=True):
+    """
+    Return a dict of name: image for every game sprite, from the atlas if
+    we can, otherwise loading each with load_and_anchor.
+
+    """
+    images = load() if use_atlas else None
+    if images is None:
+        images = dict((name, load_and_anchor(filename, ax, ay))
+                      for (name, filename, ax, ay) in SPRITES)
+    return images
+
+if __name__ == '__main__':
+    width, height = build()
+    print('packed %d sprites into a %dx%d %s' % (len(SPRITES), width, height,
+                                                 data.filepath(ATLAS_IMAGE)))
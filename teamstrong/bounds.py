@@ -0,0 +1,84 @@
+"""
+World bounds
+============
+
+Decides when a ball has left the game for good so it can stop being
+simulated and go back to its pool.
+
+A ball is out when it is:
+
+    'margin'  - more than margin pixels past the edge of the window.
+    'flight'  - has been flying for more than max_flight seconds.
+    'escaped' - off the screen, moving away from every gravity and going
+                fast enough that none of them can pull it back.
+"""
+import collections
+
+from constants import WORLD_MARGIN, MAX_FLIGHT_TIME
+import forces
+
+class WorldBounds(object):
+
+    def __init__(self, width, height, margin=WORLD_MARGIN,
+                 max_flight=MAX_FLIGHT_TIME):
+        self.width, self.height = width, height
+        self.margin = margin
+        self.max_flight = max_flight
+
+        # how many balls went for each reason.
+        self.culled = collections.Counter()
+
+    def onscreen(self, x, y):
+        return 0 < x < self.width and 0 < y < self.height
+
+    def inside(self, x, y):
+        """True if x, y is within the window plus the margin."""
+        margin = self.margin
+        return (-margin < x < self.width + margin and
+                -margin < y < self.height + margin)
+
+    def check(self, ball, gravities, now):
+        """
+        Return the reason this ball should be culled, or None to keep it.
+
+        Counts the reason too.
+        """
+        reason = self._reason(ball, gravities, now)
+        if reason is not None:
+            self.culled[reason] += 1
+        return reason
+
+    def _reason(self, ball, gravities, now):
+        x, y = ball.x, ball.y
+
+        if not self.inside(x, y):
+            return 'margin'
+
+        if now - ball.born > self.max_flight:
+            return 'flight'
+
+        if not self.onscreen(x, y) and self.escaping(ball, gravities):
+            return 'escaped'
+
+        return None
+
+    def escaping(self, ball, gravities):
+        """
+        True if the ball is heading away from all gravities with more
+        kinetic energy than they could take back from it.
+
+        """
+        vx, vy = ball.velocity
+        binding = 0.0
+        for gravity in gravities:
+            dx, dy = ball.x - gravity.x, ball.y - gravity.y
+            if dx * vx + dy * vy <= 0:
+                # still heading towards this one.
+                return False
+            binding += forces.potential(gravity, ball)
+
+        return 0.5 * ball.mass * (vx * vx + vy * vy) > binding
+
+    @property
+    def total(self):
+        return sum(self.culled.values())
@@ -0,0 +1,100 @@
+"""
+Frame command buffer
+====================
+
+Actors get killed and spawned while the game is busy updating every actor.
+Rather than change the actor registry (and the physics backend) underneath
+that loop, requests are written down here and applied together once the
+frame is done.
+
+example of use:
+
+    commands = CommandBuffer()
+
+    commands.spawn(trail)
+    commands.kill(ball)
+    commands.later(signal, 'cathit')
+
+    # (..) at the end of the frame.
+
+    commands.flush(actors, backend)
+
+Anything with a 'physics' attribute (its bodies and shapes) is added to or
+removed from the backend along with it, see physics.
+"""
+import collections
+
+class CommandBuffer(object):
+
+    def __init__(self):
+        self._calls = []
+        self._spawns = collections.OrderedDict()
+        self._kills = collections.OrderedDict()
+
+        # how many commands the last flush applied, and in total.
+        self.last_frame = collections.Counter()
+        self.totals = collections.Counter()
+
+    def spawn(self, actor):
+        """Add this actor at the end of the frame."""
+        self._spawns[actor] = None
+
+    def kill(self, actor, *args, **kwargs):
+        """
+        Remove this actor at the end of the frame, asking twice is the same
+        as asking once.
+
+        Accepts and ignores any other arguments so it can be registered
+        straight against the 'kill' signal.
+        """
+        self._kills[actor] = None
+
+    def later(self, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs) at the end of the frame. Handy when we are
+        somewhere we can't touch the backend, like a hit callback.
+
+        """
+        self._calls.append((fn, args, kwargs))
+
+    @property
+    def pending(self):
+        return len(self._calls) + len(self._spawns) + len(self._kills)
+
+    def flush(self, actors, backend):
+        """
+        Make all queued calls, then apply all queued spawns then all queued
+        kills, including any the calls asked for.
+
+        Returns the lists of actors that were spawned and killed.
+        """
+        calls, self._calls = self._calls, []
+        for fn, args, kwargs in calls:
+            fn(*args, **kwargs)
+
+        spawns, self._spawns = list(self._spawns), collections.OrderedDict()
+        kills, self._kills = list(self._kills), collections.OrderedDict()
+
+        for actor in spawns:
+            actors.append(actor)
+
+        backend.add(spawns)
+
+        killed = []
+        for actor in kills:
+            try:
+                actors.remove(actor)
+            except ValueError:
+                # puzzled. who did you want me to remove?
+                continue
+
+            killed.append(actor)
+
+        backend.remove(killed)
+
+        self.last_frame = collections.Counter(call=len(calls),
+                                              spawn=len(spawns),
+                                              kill=len(killed))
+        self.totals.update(self.last_frame)
+
+        return spawns, killed
@@ -9,5 +9,67 @@ FUDGE = 50e9
 #   can be refered to.
 DEFAULT_TYPE = 0
 BALL_TYPE = 1
-GRAVITY_TYPE = 3
+GRAVITY_TYPE = 2
 CAT_TYPE = 3
+
+# collision layers
+#   Bitmasks, pymunk only lets two shapes touch if they share a layer. Pairs
+#   that should never collide are thrown out in the broadphase this way,
+#   without ever asking Python about them. Each kind of thing sits on its
+#   own layer and balls reach into the layers of everything they can hit.
+#   SENSOR_LAYERS are the layers only sensors sit on.
+ALL_LAYERS = -1
+GRAVITY_LAYER = 1 << 1
+CAT_LAYER = 1 << 2
+SENSOR_LAYERS = GRAVITY_LAYER | CAT_LAYER
+BALL_LAYER = 1 << 0 | SENSOR_LAYERS
+
+# Most trail dots alive at once, the oldest are overwritten past this.
+TRAIL_CAPACITY = 4096
+
+# Pools look at trimming their spare objects after this many releases.
+POOL_SHRINK_EVERY = 500
+
+# World bounds. Balls this many pixels off the edge of the window, or in the
+# air for longer than this many seconds, are taken out of the game.
+WORLD_MARGIN = 200
+MAX_FLIGHT_TIME = 20.0
+
+# Timing. The physics always steps PHYSICS_RATE times a game second however
+# fast we draw, running at most MAX_CATCHUP_STEPS steps to catch up after a
+# slow frame. Drawing is capped separately at FPS_LIMIT.
+PHYSICS_RATE = 30
+MAX_CATCHUP_STEPS = 5
+FPS_LIMIT = 60
+
+# Frames a second while nobody is looking at the window.
+IDLE_RATE = 5
+
+# Force field grid. Vortexes sit still, so their summed pull can be sampled
+# every FIELD_SPACING pixels once and looked up. Balls within FIELD_NEAR
+# pixels of a vortex's edge get that vortex's pull worked out exactly, the
+# grid can't follow it that close in.
+FIELD_SPACING = 4
+FIELD_NEAR = 16
+
+# Barnes-Hut. With at least BARNES_HUT_WELLS vortexes, and BARNES_HUT_PAIRS
+# balls x vortexes, far away groups of them pull as one when their width
+# over their distance is under BARNES_HUT_THETA. Smaller theta is closer to
+# the exact sum and slower. Below both the exact sum is faster, even before
+# counting the rebuild every hit costs (see benchmarks/bench_barnes_hut.py).
+BARNES_HUT_WELLS = 1000
+BARNES_HUT_PAIRS = 500000
+BARNES_HUT_THETA = 0.5
+
+# Substeps, for the NumPy physics backend. A ball takes a physics step in
+# as many as MAX_SUBSTEPS pieces when it is close to something it can hit
+# or being pulled hard: enough that the pull over one piece moves it no
+# more than SUBSTEP_KICK pixels, and one piece takes it no more than
+# SUBSTEP_CLOSENESS of the way to whatever is nearest.
+MAX_SUBSTEPS = 16
+SUBSTEP_KICK = 0.1
+SUBSTEP_CLOSENESS = 0.25
+
+# Bytes of decoded images and textures data.cache holds on to before it lets
+# the least recently used ones go.
+ASSET_CACHE_BUDGET = 64 * 1024 * 1024
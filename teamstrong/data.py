@@ -2,15 +2,36 @@
 
 Loads data files from the "data" directory shipped with a game.
 
-Enhancing this to handle caching etc. is left as an exercise for the reader.
+In a bundled game the data files are all in one asset pack (see assetpack,
+'python setup.py pack' makes one), and come out of that instead. Without a
+pack, the loose files in the data directory are used as they always were.
+Running from source the pack is only used while it is newer than every
+loose file in it, so editing a sprite during development is never hidden
+behind a stale pack.
+
+Decoded images and their textures are cached for the life of the process,
+so loading the same sprite twice (say, every time a level starts) costs
+nothing after the first time. See AssetCache.
+
+example of use:
+
+    ball = image('ball.png', 2, 2)
+
+    # decode these now rather than when first asked for.
+    preload(['SplashScreen.png', ('ball.png', 2, 2)])
 
 Note that pyglet users should probably just add the data directory to the
 pyglet.resource search path.
 '''
 
+import collections
 import os
 import sys
 
+from constants import ASSET_CACHE_BUDGET
+import assetpack
+import imagecache
+
 if 'python' in sys.executable:
     data_py = os.path.abspath(os.path.dirname(__file__))
 else:
@@ -26,10 +47,197 @@ def filepath(filename, dirname="data"):
     '''
     return os.path.join(_dir(dirname), filename)
 
+# the pack in the data directory, if there is one.
+PACK_NAME = 'assets.pack'
+_pack = None
+
+def _stale(found):
+    '''Is any loose file in the data directory newer than this pack?
+    '''
+    for name in found.names():
+        path = filepath(os.path.join(*name.split('/')))
+        if os.path.exists(path) and os.path.getmtime(path) > found.mtime:
+            return True
+    return False
+
+def pack():
+    '''Return the AssetPack of the data directory, or None. Only a frozen
+    (bundled) game always uses it, from source it has to be up to date.
+    '''
+    global _pack
+    if _pack is None:
+        path = filepath(PACK_NAME)
+        _pack = False
+        if os.path.exists(path):
+            found = assetpack.AssetPack(path)
+            if getattr(sys, 'frozen', False) or not _stale(found):
+                _pack = found
+            else:
+                found.close()
+    return _pack or None
+
+def _packed(filename, dirname):
+    '''Return the name of a file in the pack, or None if it isn't packed.
+    '''
+    if dirname != "data" or pack() is None:
+        return None
+    name = filename.replace(os.sep, '/')
+    return name if name in pack() else None
+
+def exists(filename, dirname="data"):
+    '''Is there such a file in the data directory (or pack)?
+    '''
+    return (_packed(filename, dirname) is not None or
+            os.path.exists(filepath(filename, dirname)))
+
 def load(filename, mode='rb', dirname="data"):
     '''Open a file in the data directory.
 
-    "mode" is passed as the second arg to open().
+    "mode" is passed as the second arg to open(). Packed files are always
+    opened as binary.
     '''
+    name = _packed(filename, dirname)
+    if name is not None:
+        return pack().open(name)
     return open(os.path.join(_dir(dirname), filename), mode)
 
+
+class AssetCache(object):
+    '''Loaded assets keyed by whatever identifies them, usually the path
+    and the parameters they were loaded with.
+
+    Every entry records roughly how many bytes it holds. When the total goes
+    over budget the least recently used entries are dropped, anything still
+    in use elsewhere stays alive of course, it just gets loaded again if
+    asked for after that.
+    '''
+
+    def __init__(self, budget=ASSET_CACHE_BUDGET):
+        self.budget = budget
+
+        # key: (asset, bytes), least recently used first.
+        self._entries = collections.OrderedDict()
+        self.held = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, loader, size=None):
+        '''Return the asset for key, calling loader() to make it if we
+        don't have it. size(asset) says how many bytes it holds.
+        '''
+        try:
+            asset, nbytes = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            asset = loader()
+            nbytes = size(asset) if size else 0
+            self.held += nbytes
+        else:
+            self.hits += 1
+
+        # (re)insert as the most recently used.
+        self._entries[key] = asset, nbytes
+        self.evict()
+        return asset
+
+    def evict(self, budget=None):
+        '''Drop least recently used entries until we fit in budget.'''
+        if budget is None:
+            budget = self.budget
+        while self.held > budget and len(self._entries) > 1:
+            key, (asset, nbytes) = self._entries.popitem(last=False)
+            self.held -= nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.held = 0
+
+    def sizes(self):
+        '''Return a list of (key, bytes) for every entry, biggest first.'''
+        return sorted(((key, nbytes) for key, (asset, nbytes)
+                       in self._entries.items()), key=lambda e: -e[1])
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+# the one cache everything loads through.
+cache = AssetCache()
+
+def image_bytes(image):
+    '''Bytes of RGBA pixels in an image or texture.'''
+    return image.width * image.height * 4
+
+def decoded(filename, dirname="data"):
+    '''Return the decoded pyglet image of a file in the data directory.
+
+    Pixels come from the on disk cache of decoded images when they can, see
+    imagecache.
+    '''
+    path = filepath(filename, dirname)
+    return cache.get(('decoded', path), lambda: decode(filename, dirname),
+                     image_bytes)
+
+def decode(filename, dirname="data"):
+    '''Decode an image in the data directory (or pack), skipping the
+    in memory cache. Safe to call from another thread.
+    '''
+    path = filepath(filename, dirname)
+    name = _packed(filename, dirname)
+    if name is None:
+        return imagecache.disk.load(path)
+    return imagecache.disk.load(path, file=pack().open(name),
+                                stamp=pack().stamp(name))
+
+def warm(filename, decoded_image, dirname="data"):
+    '''Put an image decoded somewhere else (another thread, say) into the
+    cache as the decoded image of filename.
+    '''
+    path = filepath(filename, dirname)
+    return cache.get(('decoded', path), lambda: decoded_image, image_bytes)
+
+def texture(filename, dirname="data"):
+    '''Return the texture of an image in the data directory.
+    '''
+    path = filepath(filename, dirname)
+    return cache.get(('texture', path),
+                     lambda: decoded(filename, dirname).get_texture(),
+                     image_bytes)
+
+def image(filename, anchor_x=None, anchor_y=None, dirname="data"):
+    '''Return an image of a file in the data directory, ready to draw.
+
+    If given, its x and y anchor points are set as a fraction of total width
+    and height (2 is the middle). Images of the same file share a texture
+    whatever their anchors.
+    '''
+    path = filepath(filename, dirname)
+
+    def anchored():
+        tex = texture(filename, dirname)
+        region = tex.get_region(0, 0, tex.width, tex.height)
+        if anchor_x and anchor_y:
+            region.anchor_x = region.width // anchor_x
+            region.anchor_y = region.height // anchor_y
+        return region
+
+    # the region owns no pixels, they belong to the texture.
+    return cache.get(('image', path, anchor_x, anchor_y), anchored)
+
+def preload(assets, dirname="data"):
+    '''Load a list of images now so nobody waits for them later.
+
+    Each is a filename, or a (filename, anchor_x, anchor_y) tuple.
+    '''
+    images = []
+    for asset in assets:
+        if isinstance(asset, tuple):
+            images.append(image(*asset, dirname=dirname))
+        else:
+            images.append(image(asset, dirname=dirname))
+    return images
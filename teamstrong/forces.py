@@ -0,0 +1,589 @@
+"""
+Gravity force evaluation.
+
+Every ball feels every vortex. The simple way (and the way the game started
+out) is for each ball to ask each gravity for its pull with Gravity.force_on,
+which is fine for a handful of balls but costs a lot of interpreted work once
+the screen fills up.
+
+net_forces does the whole N balls x M vortexes sum in one go with numpy and
+writes the result back to the balls. If numpy isn't around we quietly use the
+per-object path instead.
+
+The vortexes hardly ever change though, so a ForceField can sample their
+summed pull on a grid once and look each ball up in it instead, see
+ForceField.
+
+With a thousand vortexes and hundreds of balls even the batched sum gets
+slow, so past BARNES_HUT_WELLS vortexes and BARNES_HUT_PAIRS balls x vortexes
+a BarnesHut tree lumps far away vortexes together and only sums the close
+ones one by one.
+
+example of use:
+
+    apply_net_forces(balls, gravities)
+
+    # or, from the grid.
+    field = ForceField(640, 480)
+    apply_net_forces(balls, gravities, field)
+
+    # or, from a tree once there are enough vortexes to make it worth it.
+    tree = BarnesHut(theta=0.5)
+    apply_net_forces(balls, gravities, tree=tree)
+
+"""
+import functools
+import math
+
+from constants import G, FUDGE, FIELD_SPACING, FIELD_NEAR
+from constants import BARNES_HUT_THETA, BARNES_HUT_WELLS, BARNES_HUT_PAIRS
+from utils import lazy_import
+
+# numpy takes a while to import, so not until the first time it's used.
+numpy = lazy_import('numpy')
+
+def force_on(gravity, obj):
+    """
+    Returns the force a gravity exerts on an object that defines x, y and
+    mass.
+
+    """
+    dx = gravity.x - obj.x
+    dy = gravity.y - obj.y
+
+    force = G * FUDGE * gravity.mass * obj.mass / (dx * dx + dy * dy)
+
+    # adjust for this gravity strength.
+    force = gravity.strength * force
+
+    # angle from ball to this gravity.
+    angle = math.atan2(dy, dx)
+
+    return force * math.cos(angle), force * math.sin(angle)
+
+def potential(gravity, obj):
+    """
+    Returns the energy it would take obj to climb out of the gravity's well
+    from where it is now.
+
+    """
+    dist = math.hypot(gravity.x - obj.x, gravity.y - obj.y)
+    return G * FUDGE * gravity.strength * gravity.mass * obj.mass / dist
+
+def net_force_on(obj, gravities):
+    """Sum the force from all gravities on a single object."""
+    forcex, forcey = 0, 0
+    for gravity in gravities:
+        _forcex, _forcey = force_on(gravity, obj)
+        forcex += _forcex
+        forcey += _forcey
+
+    return forcex, forcey
+
+def gather(objs, *attrs):
+    """
+    Return a float array with one row per object and one column per attr.
+
+    """
+    return numpy.array([[getattr(o, a) for a in attrs] for o in objs],
+                       dtype=numpy.float64).reshape(len(objs), len(attrs))
+
+def net_forces(balls, wells):
+    """
+    Vectorised net force on every ball from every well.
+
+    balls: (N, 3) array of x, y, mass.
+    wells: (M, 4) array of x, y, mass, strength.
+
+    Returns an (N, 2) array of force x, y.
+
+    """
+    dx = wells[:, 0] - balls[:, 0, None]
+    dy = wells[:, 1] - balls[:, 1, None]
+    dist2 = dx * dx + dy * dy
+
+    # G * FUDGE * m1 * m2 * strength / d ** 2, pointing at the well. A ball
+    # sitting exactly on a well gets no pull from it rather than infinity.
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        scale = (G * FUDGE * wells[:, 2] * wells[:, 3] * balls[:, 2, None] /
+                 (dist2 * numpy.sqrt(dist2)))
+    scale[dist2 == 0] = 0.0
+
+    return numpy.column_stack(((scale * dx).sum(axis=1),
+                               (scale * dy).sum(axis=1)))
+
+class ForceField(object):
+    """
+    The summed pull of every well on a unit mass, sampled every spacing
+    pixels over width x height. Balls look their force up with bilinear
+    interpolation.
+
+    The grid is only redone for a well when it moves, changes or goes away,
+    see sync. Just the summed grid is kept, a well's old share is worked out
+    again from what it was to take it back out, so memory doesn't grow with
+    the number of wells.
+
+    Close to a well the pull changes too fast for the grid, so for balls
+    within near pixels of a well's edge that well's share is taken back out
+    (from its exact pull at the corners of the ball's cell) and worked out
+    exactly. Balls off the grid get the exact sum.
+    """
+
+    def __init__(self, width, height, spacing=FIELD_SPACING, near=FIELD_NEAR):
+        self.width, self.height = width, height
+        self.spacing = spacing
+        self.near = near
+
+        self.nx = int(math.ceil(width / float(spacing))) + 1
+        self.ny = int(math.ceil(height / float(spacing))) + 1
+        self._x = numpy.arange(self.nx, dtype=numpy.float64) * spacing
+        self._y = numpy.arange(self.ny, dtype=numpy.float64) * spacing
+
+        # x and y force on a unit mass at each grid point, (ny, nx) arrays.
+        self.fx = numpy.zeros((self.ny, self.nx))
+        self.fy = numpy.zeros((self.ny, self.nx))
+
+        # how many wells each grid cell is near, and which: the wells near
+        # cell c are _near_wells[_near_start[c]:][:_nearby[c]], indexes into
+        # wells. Balls only need the exact pull of those.
+        self._nearby = numpy.zeros((self.ny, self.nx), dtype=numpy.int64)
+        self._near_start = numpy.zeros(self.ny * self.nx, dtype=numpy.int64)
+        self._near_wells = numpy.zeros(0, dtype=numpy.int64)
+
+        # well: (signature, cells it is near)
+        self._wells = {}
+
+        # the wells as of the last sync, in order, as an (M, 5) array of
+        # x, y, mass, strength, radius.
+        self.wells = numpy.zeros((0, 5))
+
+        # how many wells' shares have been worked out, in total.
+        self.rebuilds = 0
+
+    @staticmethod
+    def signature(well):
+        """Everything about a well that its share depends on."""
+        return (well.x, well.y, well.mass, well.strength,
+                getattr(well, 'radius', 0))
+
+    def share(self, x, y, mass, strength):
+        """The pull of one well on a unit mass at every grid point."""
+        dx = x - self._x[None, :]
+        dy = y - self._y[:, None]
+        dist2 = dx * dx + dy * dy
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            scale = G * FUDGE * mass * strength / (dist2 * numpy.sqrt(dist2))
+        scale[dist2 == 0] = 0.0
+        return scale * dx, scale * dy
+
+    def _take(self, signature, cells):
+        """Take a well's share back out of the grid, as it was."""
+        fx, fy = self.share(*signature[:4])
+        self.fx -= fx
+        self.fy -= fy
+        self._nearby[cells] -= 1
+
+    def _cells(self, x, y, radius):
+        """The cells a ball could be in and still be near this well."""
+        reach = radius + self.near
+        i0, i1 = (int(math.floor((x - reach) / self.spacing)),
+                  int(math.floor((x + reach) / self.spacing)) + 1)
+        j0, j1 = (int(math.floor((y - reach) / self.spacing)),
+                  int(math.floor((y + reach) / self.spacing)) + 1)
+        return (slice(max(j0, 0), max(j1, 0)), slice(max(i0, 0), max(i1, 0)))
+
+    def sync(self, gravities):
+        """
+        Bring the grid up to date with these wells, only redoing the shares
+        of wells that are new, changed or gone.
+
+        Returns how many shares changed.
+        """
+        changed = 0
+        signatures = []
+        current = set()
+        for well in gravities:
+            current.add(well)
+            signature = self.signature(well)
+            signatures.append(signature)
+
+            old = self._wells.get(well)
+            if old is not None and old[0] == signature:
+                continue
+            if old is not None:
+                self._take(*old)
+
+            cells = self._cells(signature[0], signature[1], signature[4])
+            self._nearby[cells] += 1
+
+            fx, fy = self.share(*signature[:4])
+            self.fx += fx
+            self.fy += fy
+            self._wells[well] = signature, cells
+            self.rebuilds += 1
+            changed += 1
+
+        for well in [w for w in self._wells if w not in current]:
+            self._take(*self._wells.pop(well))
+            changed += 1
+
+        if changed or len(signatures) != len(self.wells):
+            self.wells = numpy.array(signatures,
+                                     dtype=numpy.float64).reshape(-1, 5)
+            self._index_near()
+        return changed
+
+    def _index_near(self):
+        """Work out which wells each cell is near, see _near_wells."""
+        cells = numpy.arange(self.ny * self.nx).reshape(self.ny, self.nx)
+        pairs = [(cells[self._cells(x, y, radius)].ravel(), m)
+                 for m, (x, y, _, _, radius) in enumerate(self.wells.tolist())]
+
+        if not pairs:
+            self._near_wells = numpy.zeros(0, dtype=numpy.int64)
+            return
+
+        flat = numpy.concatenate([c for c, _ in pairs])
+        wells = numpy.repeat([m for _, m in pairs], [len(c) for c, _ in pairs])
+        order = numpy.argsort(flat, kind='mergesort')
+        self._near_wells = wells[order]
+
+        counts = self._nearby.ravel()
+        self._near_start = numpy.cumsum(counts) - counts
+
+    def forces(self, balls):
+        """
+        Net force on every ball from the wells as of the last sync.
+
+        balls: (N, 3) array of x, y, mass.
+
+        Returns an (N, 2) array of force x, y.
+        """
+        wells = self.wells
+        x, y = balls[:, 0], balls[:, 1]
+        ongrid = ((x >= 0) & (x <= self.width) &
+                  (y >= 0) & (y <= self.height))
+
+        out = numpy.empty((len(balls), 2))
+        if not ongrid.all():
+            out[~ongrid] = net_forces(balls[~ongrid], wells[:, :4])
+        if not ongrid.any():
+            return out
+
+        inside = balls[ongrid]
+        u = inside[:, 0] / self.spacing
+        v = inside[:, 1] / self.spacing
+        i = numpy.minimum(u.astype(int), self.nx - 2)
+        j = numpy.minimum(v.astype(int), self.ny - 2)
+        fu, fv = u - i, v - j
+
+        def blend(corners, fu_, fv_):
+            # bilinear between the values at the four corners of each cell.
+            low, right, up, both = corners
+            return ((low * (1 - fu_) + right * fu_) * (1 - fv_) +
+                    (up * (1 - fu_) + both * fu_) * fv_)
+
+        def lerp(grid):
+            return blend((grid[j, i], grid[j, i + 1],
+                          grid[j + 1, i], grid[j + 1, i + 1]), fu, fv)
+
+        fx = lerp(self.fx)
+        fy = lerp(self.fy)
+
+        # swap the grid's guess for the real thing near each well, every
+        # (ball, well) pair in a cell near that well at once.
+        cell = (numpy.minimum(v.astype(int), self.ny - 1) * self.nx +
+                numpy.minimum(u.astype(int), self.nx - 1))
+        counts = self._nearby.ravel()[cell]
+        total = counts.sum()
+        if total:
+            n = numpy.repeat(numpy.arange(len(inside)), counts)
+            first = numpy.cumsum(counts) - counts
+            m = self._near_wells[numpy.repeat(self._near_start[cell] - first,
+                                              counts) + numpy.arange(total)]
+
+            wx, wy = wells[m, 0], wells[m, 1]
+            pull = G * FUDGE * wells[m, 2] * wells[m, 3]
+
+            def exact(px, py):
+                # the pull of well m on a unit mass at px, py.
+                dx = wx - px
+                dy = wy - py
+                dist2 = dx * dx + dy * dy
+                with numpy.errstate(divide='ignore', invalid='ignore'):
+                    scale = pull / (dist2 * numpy.sqrt(dist2))
+                scale[dist2 == 0] = 0.0
+                return scale * dx, scale * dy
+
+            # what the grid has for well m around the ball is its exact pull
+            # at the cell's corners, the same as share() put there.
+            x0 = i[n] * float(self.spacing)
+            y0 = j[n] * float(self.spacing)
+            x1, y1 = x0 + self.spacing, y0 + self.spacing
+            corners = [exact(cx, cy) for cx, cy in
+                       ((x0, y0), (x1, y0), (x0, y1), (x1, y1))]
+            gridx = blend([c[0] for c in corners], fu[n], fv[n])
+            gridy = blend([c[1] for c in corners], fu[n], fv[n])
+
+            realx, realy = exact(inside[n, 0], inside[n, 1])
+            fx += numpy.bincount(n, realx - gridx, minlength=len(inside))
+            fy += numpy.bincount(n, realy - gridy, minlength=len(inside))
+
+        out[ongrid] = numpy.column_stack((fx, fy)) * inside[:, 2, None]
+        return out
+
+    @property
+    def nbytes(self):
+        return (self.fx.nbytes + self.fy.nbytes + self._nearby.nbytes +
+                self._near_start.nbytes + self._near_wells.nbytes)
+
+class BarnesHut(object):
+    """
+    Approximate net force from a quadtree over the wells.
+
+    Each node of the tree knows the total pull and the centre of pull of the
+    wells under it. A node whose width over the ball's distance from its box
+    is less than theta pulls on that ball as one well, otherwise we look at
+    its children instead. (Not the distance from the centre of pull, which
+    can sit in a corner of the box with the ball right next to it.) theta = 0 is the exact sum, bigger is faster and
+    rougher.
+
+    The tree is only rebuilt when the wells change, see sync.
+    """
+
+    # deeper than this and wells are as good as on top of each other.
+    max_depth = 20
+
+    def __init__(self, theta=BARNES_HUT_THETA, min_wells=BARNES_HUT_WELLS,
+                 min_pairs=BARNES_HUT_PAIRS):
+        self.theta = theta
+
+        # apply_net_forces only uses us with at least this many wells, and
+        # balls x wells.
+        self.min_wells = min_wells
+        self.min_pairs = min_pairs
+
+        self._signatures = None
+
+        # how many times the tree has been built.
+        self.builds = 0
+
+    def sync(self, gravities):
+        """
+        Rebuild the tree if the wells moved, changed or came and went since
+        last time. Returns True if it was rebuilt.
+        """
+        signatures = [(g.x, g.y, g.mass, g.strength) for g in gravities]
+        if signatures == self._signatures:
+            return False
+
+        self._signatures = signatures
+        self.build(numpy.array(signatures,
+                               dtype=numpy.float64).reshape(-1, 4))
+        return True
+
+    def build(self, wells):
+        """
+        Build the tree over wells, an (M, 4) array of x, y, mass, strength.
+
+        Nodes are made a level at a time. A well's key at each level is its
+        parent's key * 4 plus its quadrant, so sorting a level by key keeps
+        the children of a node together and in the same order as their
+        parents.
+        """
+        x, y = wells[:, 0], wells[:, 1]
+        pull = G * FUDGE * wells[:, 2] * wells[:, 3]
+
+        x0, y0 = (x.min(), y.min()) if len(wells) else (0.0, 0.0)
+        size = max(x.max() - x0, y.max() - y0) if len(wells) else 0.0
+        size = size or 1.0
+
+        levels = []
+        active = numpy.arange(len(wells))
+        keys = numpy.zeros(len(wells), dtype=numpy.int64)
+        count = 0
+        for depth in range(self.max_depth + 1):
+            if not len(active):
+                break
+
+            cells = 1 << depth
+            cx = numpy.minimum(((x[active] - x0) / size * cells).astype(
+                    numpy.int64), cells - 1)
+            cy = numpy.minimum(((y[active] - y0) / size * cells).astype(
+                    numpy.int64), cells - 1)
+            keys = keys * 4 + (cx & 1) * 2 + (cy & 1) if depth else keys
+
+            unique, first, inverse = numpy.unique(keys, return_index=True,
+                                                  return_inverse=True)
+            weight = numpy.bincount(inverse, pull[active])
+            members = numpy.bincount(inverse)
+
+            # a node with no pull at all sits at the middle of its wells.
+            total = numpy.where(weight == 0, 1.0, weight)
+            middle = weight == 0
+            comx = numpy.where(middle, numpy.bincount(inverse, x[active]) /
+                               members,
+                               numpy.bincount(inverse, pull[active] *
+                                              x[active]) / total)
+            comy = numpy.where(middle, numpy.bincount(inverse, y[active]) /
+                               members,
+                               numpy.bincount(inverse, pull[active] *
+                                              y[active]) / total)
+
+            leaf = (members == 1) | (depth == self.max_depth)
+            levels.append((count, unique, comx, comy, weight,
+                           numpy.full(len(unique), size / cells), leaf,
+                           x0 + cx[first] * size / cells,
+                           y0 + cy[first] * size / cells))
+            count += len(unique)
+
+            keep = ~leaf[inverse]
+            active, keys = active[keep], keys[keep]
+
+        self.comx = numpy.concatenate([l[2] for l in levels] or [[]])
+        self.comy = numpy.concatenate([l[3] for l in levels] or [[]])
+        self.weight = numpy.concatenate([l[4] for l in levels] or [[]])
+        self.size = numpy.concatenate([l[5] for l in levels] or [[]])
+        self.leaf = numpy.concatenate([l[6] for l in levels] or [[]]).astype(
+                bool)
+
+        # bottom left corner of each node's box, the box is size across.
+        self.boxx = numpy.concatenate([l[7] for l in levels] or [[]])
+        self.boxy = numpy.concatenate([l[8] for l in levels] or [[]])
+
+        # a node's children are child_count nodes from child_start.
+        self.child_start = numpy.zeros(count, dtype=numpy.int64)
+        self.child_count = numpy.zeros(count, dtype=numpy.int64)
+        for (first, keys), (below, children) in zip(
+                [l[:2] for l in levels], [l[:2] for l in levels[1:]]):
+            parents = children >> 2
+            start = numpy.searchsorted(parents, keys, side='left')
+            end = numpy.searchsorted(parents, keys, side='right')
+            self.child_start[first:first + len(keys)] = below + start
+            self.child_count[first:first + len(keys)] = end - start
+
+        self.builds += 1
+
+    def forces(self, balls):
+        """
+        Net force on every ball from the wells as of the last sync.
+
+        balls: (N, 3) array of x, y, mass.
+
+        Returns an (N, 2) array of force x, y.
+
+        Every ball starts at the root and works down the tree with the
+        others, a level at a time.
+        """
+        fx = numpy.zeros(len(balls))
+        fy = numpy.zeros(len(balls))
+        if not len(self.weight):
+            return numpy.column_stack((fx, fy))
+
+        theta2 = self.theta * self.theta
+        ball = numpy.arange(len(balls))
+        node = numpy.zeros(len(balls), dtype=numpy.int64)
+        while len(ball):
+            x, y = balls[ball, 0], balls[ball, 1]
+            size = self.size[node]
+            outx = numpy.maximum(numpy.abs(x - self.boxx[node] - size / 2) -
+                                 size / 2, 0)
+            outy = numpy.maximum(numpy.abs(y - self.boxy[node] - size / 2) -
+                                 size / 2, 0)
+            far = self.leaf[node] | (size * size <
+                                     theta2 * (outx * outx + outy * outy))
+
+            dx = self.comx[node] - x
+            dy = self.comy[node] - y
+            dist2 = dx * dx + dy * dy
+
+            near_ball, near_node = ball[~far], node[~far]
+            ball, node = ball[far], node[far]
+            dx, dy, dist2 = dx[far], dy[far], dist2[far]
+
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                scale = self.weight[node] / (dist2 * numpy.sqrt(dist2))
+            scale[dist2 == 0] = 0.0
+            fx += numpy.bincount(ball, scale * dx, minlength=len(balls))
+            fy += numpy.bincount(ball, scale * dy, minlength=len(balls))
+
+            # open up the rest.
+            counts = self.child_count[near_node]
+            total = counts.sum()
+            ball = numpy.repeat(near_ball, counts)
+            node = (numpy.repeat(self.child_start[near_node] -
+                                 (numpy.cumsum(counts) - counts), counts) +
+                    numpy.arange(total))
+
+        return numpy.column_stack((fx, fy)) * balls[:, 2, None]
+
+def _no_pull(balls):
+    return numpy.zeros((len(balls), 2))
+
+def puller(gravities, field=None, tree=None):
+    """
+    Bring the field or tree (if given) up to date with these gravities, and
+    return a function from an (N, 3) array of ball x, y, mass to the (N, 2)
+    pull on them, see pull.
+
+    The function only looks the pull up, so it can be called as often as
+    needed until the gravities next change.
+    """
+    if not gravities:
+        return _no_pull
+
+    if field is not None:
+        field.sync(gravities)
+        return field.forces
+
+    exact = functools.partial(net_forces,
+                              wells=gather(gravities, 'x', 'y', 'mass',
+                                           'strength'))
+    if tree is None or len(gravities) < tree.min_wells:
+        return exact
+
+    def either(balls):
+        # the tree only pays for itself (and its rebuilds) with lots of
+        # balls too, and is only brought up to date when it is used.
+        if len(balls) * len(gravities) < tree.min_pairs:
+            return exact(balls)
+        tree.sync(gravities)
+        return tree.forces(balls)
+    return either
+
+def pull(balls, gravities, field=None, tree=None):
+    """
+    Vectorised net force on every ball from these gravities, from the field
+    or the tree if given, see apply_net_forces.
+
+    balls: (N, 3) array of x, y, mass.
+
+    Returns an (N, 2) array of force x, y.
+    """
+    return puller(gravities, field, tree)(balls)
+
+def apply_net_forces(balls, gravities, field=None, tree=None):
+    """
+    Set the force on every ball to the sum of the pull from all gravities.
+
+    If given a ForceField the pull comes from that, after bringing it up to
+    date with the gravities. Otherwise if given a BarnesHut it is used once
+    there are at least tree.min_wells gravities and tree.min_pairs balls x
+    gravities.
+    """
+    balls = list(balls)
+    gravities = list(gravities)
+
+    if not balls:
+        return
+
+    if not numpy or not gravities:
+        for ball in balls:
+            ball.force = net_force_on(ball, gravities)
+        return
+
+    forces = pull(gather(balls, 'x', 'y', 'mass'), gravities, field, tree)
+
+    for ball, (forcex, forcey) in zip(balls, forces.tolist()):
+        ball.force = (forcex, forcey)
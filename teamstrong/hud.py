@@ -0,0 +1,77 @@
+"""
+HUD primitives
+==============
+
+Heads up display bits that live in a pyglet batch and only do any work
+when they change, rather than being drawn by hand every frame.
+
+example of use:
+
+    hud = pyglet.graphics.Batch()
+    gauge = Gauge(10, 80, 50, 340, hud, color=(0.0, 1.0, 0.0))
+
+    # (..) when whatever it shows changes.
+    gauge.set(fraction=0.5, color=(1.0, 1.0, 0.0))
+
+    # (..) every frame.
+    hud.draw()
+"""
+from pyglet import gl
+
+class Gauge(object):
+    """
+    A bar that fills up from the bottom. The top edge is drawn in color and
+    the bottom edge in bottom_color (the same as color if not given), with a
+    gradient in between.
+
+    """
+
+    def __init__(self, x, y, width, height, batch, group=None, fraction=1.0,
+                 color=(1.0, 1.0, 1.0), bottom_color=None, visible=True):
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+
+        self.fraction = fraction
+        self.color = color
+        self.bottom_color = bottom_color
+        self._visible = visible
+
+        self.vertex_list = batch.add(4, gl.GL_QUADS, group, 'v2f', 'c3f')
+        self._update()
+
+    def set(self, fraction=None, color=None, bottom_color=None):
+        """Change any of the fill, top colour or bottom colour."""
+        if fraction is not None:
+            self.fraction = fraction
+        if color is not None:
+            self.color = color
+        if bottom_color is not None:
+            self.bottom_color = bottom_color
+        self._update()
+
+    def _get_visible(self):
+        return self._visible
+    def _set_visible(self, visible):
+        self._visible = visible
+        self._update()
+    visible = property(_get_visible, _set_visible)
+
+    def _update(self):
+        if not self._visible:
+            # squash it down to nothing.
+            self.vertex_list.vertices[:] = [0] * 8
+            return
+
+        left, right = self.x, self.x + self.width
+        bottom = self.y
+        top = self.y + self.height * self.fraction
+
+        self.vertex_list.vertices[:] = [left, top, right, top,
+                                        right, bottom, left, bottom]
+
+        bottom_color = self.bottom_color or self.color
+        self.vertex_list.colors[:] = (tuple(self.color) * 2 +
+                                      tuple(bottom_color) * 2)
+
+    def delete(self):
+        self.vertex_list.delete()
@@ -0,0 +1,157 @@
+"""
+Decoded image cache
+===================
+
+Decoding a PNG costs far more than reading the same pixels raw, and some
+setups fall back to pyglet's pure Python PNG decoder which is slow indeed.
+So the first time an image is decoded its RGBA pixels are written out to a
+cache directory, and every launch after that reads (memory maps) those
+instead.
+
+Each cache file is a small header followed by the raw pixels, rows bottom
+first the way pyglet likes them:
+
+    magic, source mtime, source size, width, height, pixels..
+
+If the source file's mtime or size no longer match the header the entry is
+stale and gets decoded and written again. Images that don't live in a file
+of their own (see assetpack) pass a file object and their own stamp.
+
+The cache lives in ~/.teamstrong/images, or wherever the TEAMSTRONG_CACHE
+environment variable points. Set TEAMSTRONG_CACHE to an empty string to
+switch it off.
+
+example of use:
+
+    image = disk.load('/path/to/SplashScreen.png')
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+MAGIC = b'TSRGBA01'
+
+# magic, mtime, size, width, height.
+HEADER = struct.Struct('<8sdqII')
+
+def default_directory():
+    directory = os.environ.get('TEAMSTRONG_CACHE')
+    if directory is None:
+        directory = os.path.join(os.path.expanduser('~'), '.teamstrong',
+                                 'images')
+    return directory
+
+class DiskImageCache(object):
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = default_directory()
+        self.directory = directory
+
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, path):
+        """Where the decoded pixels of the image at path are kept."""
+        name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + '.rgba')
+
+    def load(self, path, file=None, stamp=None):
+        """
+        Return a pyglet image of the file at path, from the cache if it
+        is fresh, otherwise decoded (and cached for next time).
+
+        If given, file is read instead of path and stamp is an (mtime, size)
+        pair standing in for the file's.
+        """
+        import pyglet
+
+        if stamp is None:
+            stat = os.stat(path)
+            stamp = stat.st_mtime, stat.st_size
+
+        if self.directory:
+            pixels = self.read(path, stamp)
+            if pixels is not None:
+                self.hits += 1
+                width, height, data = pixels
+                return pyglet.image.ImageData(width, height, 'RGBA', data)
+
+        self.misses += 1
+        image = pyglet.image.load(path, file=file)
+        if self.directory:
+            self.write(path, stamp, image)
+        return image
+
+    def read(self, path, stamp):
+        """
+        Return (width, height, pixels) from a fresh cache entry for path,
+        or None.
+
+        """
+        try:
+            f = open(self.entry(path), 'rb')
+        except IOError:
+            return None
+
+        with f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError):
+                # empty or unmappable, treat as missing.
+                return None
+
+            try:
+                if len(mapped) < HEADER.size:
+                    return None
+
+                magic, mtime, size, width, height = HEADER.unpack(
+                        mapped[:HEADER.size])
+                if (magic != MAGIC or (mtime, size) != tuple(stamp) or
+                        len(mapped) != HEADER.size + width * height * 4):
+                    return None
+
+                # pyglet wants a string of its own, so this is a copy out of
+                # the mapping (but a copy, not a decode).
+                return width, height, mapped[HEADER.size:]
+            finally:
+                mapped.close()
+
+    def write(self, path, stamp, image):
+        """
+        Cache the pixels of image, decoded from path. Failing to (say, a
+        read only home directory) is not worth stopping the game for.
+
+        """
+        pixels = image.get_data('RGBA', image.width * 4)
+        mtime, size = stamp
+        header = HEADER.pack(MAGIC, mtime, size, image.width, image.height)
+
+        entry = self.entry(path)
+        partial = '%s.%d.tmp' % (entry, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(partial, 'wb') as f:
+                f.write(header)
+                f.write(pixels)
+
+            # readers only ever see a whole entry or none at all.
+            if os.name == 'nt' and os.path.exists(entry):
+                os.remove(entry)
+            os.rename(partial, entry)
+        except EnvironmentError:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def clear(self):
+        """Delete every cache entry."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.rgba'):
+                os.remove(os.path.join(self.directory, name))
+
+# the cache everything decodes through.
+disk = DiskImageCache()
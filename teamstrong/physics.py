@@ -0,0 +1,621 @@
+"""
+Physics backends
+================
+
+Everything the game asks of a physics engine, so the engine can be swapped.
+A backend makes bodies for the actors, adds and removes them, takes the
+forces on the balls, steps, and says when a ball starts touching a vortex or
+the cat.
+
+PymunkBackend is the pymunk space the game always had. NumpyBackend keeps
+every ball's position, velocity and force in arrays and moves them all at
+once. Balls only feel the vortexes and only ever touch sensors, so there is
+no need for a collision pipeline, just overlap tests.
+
+example of use:
+
+    backend = BACKENDS['numpy']()
+    backend.on_hit(BALL_TYPE, CAT_TYPE, ball_hit_cat)
+
+    body, shape = backend.circle(ball, x, y, mass=1, radius=5)
+
+    # (..) ball.physics is (body, shape).
+    backend.add([ball])
+
+    backend.set_forces(balls, forces)
+    backend.step(1 / 30.0)
+
+Actors hand their body and shape back to the backend through their
+'physics' attribute, like pymunk objects to a space, and anything with a
+true 'static' attribute is left where it is.
+
+Bodies from either backend have a position and a velocity (with x and y),
+and a force that can be set.
+"""
+import collections
+
+import pymunk
+
+import forces
+from constants import ALL_LAYERS, SENSOR_LAYERS, DEFAULT_TYPE
+from constants import MAX_SUBSTEPS, SUBSTEP_KICK, SUBSTEP_CLOSENESS
+from utils import lazy_import
+
+numpy = lazy_import('numpy')
+
+def _split(actors):
+    """Sort the physics objects of these actors into dynamic and static."""
+    dynamic, static = [], []
+    for actor in actors:
+        items = getattr(actor, 'physics', ())
+        if getattr(actor, 'static', False):
+            static.extend(items)
+        else:
+            dynamic.extend(items)
+    return dynamic, static
+
+#----------------------------------------------------------------
+# pymunk.
+
+class PymunkBackend(object):
+    """A pymunk space with no gravity of its own."""
+
+    name = 'pymunk'
+
+    # pymunk steps everything together, so never needs to ask for forces
+    # part way through a step, see NumpyBackend.gravity.
+    gravity = None
+
+    def __init__(self):
+        self.space = pymunk.Space()
+        self.space.gravity = (0, 0)
+
+    def _shape(self, elem, shape):
+        shape.collision_type = getattr(elem, 'collision', DEFAULT_TYPE)
+        shape.layers = getattr(elem, 'layers', ALL_LAYERS)
+        shape.sensor = getattr(elem, 'sensor', False)
+
+        # so collision callbacks can find us from the shape.
+        shape.elem = elem
+        return shape
+
+    def _body(self, elem, x, y, mass, inertia):
+        if getattr(elem, 'static', False) or mass is None:
+            body = pymunk.Body(pymunk.inf, pymunk.inf)
+        else:
+            body = pymunk.Body(mass, inertia)
+        body.position = x, y
+        return body
+
+    def circle(self, elem, x, y, mass, radius):
+        """
+        A body and circle shape for elem, at x, y. If elem has a
+        sensor_radius the shape leaves sensors to a probe, a second circle
+        that size on the same body, which goes in and out with the shape.
+
+        """
+        inertia = None
+        if mass is not None:
+            inertia = pymunk.moment_for_circle(mass, 0, radius)
+        body = self._body(elem, x, y, mass, inertia)
+        shape = self._shape(elem, pymunk.Circle(body, radius))
+
+        sensor_radius = getattr(elem, 'sensor_radius', None)
+        if sensor_radius is not None:
+            shape.probe = self._shape(elem, pymunk.Circle(body,
+                                                          sensor_radius))
+            shape.probe.layers = shape.layers & SENSOR_LAYERS
+            shape.layers &= ~SENSOR_LAYERS
+        return body, shape
+
+    def box(self, elem, x, y, half_width, half_height):
+        """An immovable body and box shape for elem, centred on x, y."""
+        body = self._body(elem, x, y, None, None)
+        return body, self._shape(elem, pymunk.Poly(body, [
+                (-half_width, -half_height), (-half_width, half_height),
+                (half_width, half_height), (half_width, -half_height)]))
+
+    def on_hit(self, kind, other, callback):
+        """
+        Call callback(elem, other_elem) when something of collision type
+        kind starts touching something of type other. They pass through
+        each other either way.
+
+        """
+        def begin(space, arbiter):
+            elem, other_elem = [shape.elem for shape in arbiter.shapes]
+            callback(elem, other_elem)
+            return False
+
+        self.space.add_collision_handler(kind, other, begin, None, None, None)
+
+    def _probes(self, items):
+        """The items and the probes of any shapes among them."""
+        probes = [item.probe for item in items
+                  if getattr(item, 'probe', None) is not None]
+        return items + probes
+
+    def add(self, actors):
+        """Add all the actors' pymunk objects with as few calls as we can."""
+        dynamic, static = map(self._probes, _split(actors))
+        if dynamic:
+            self.space.add(*dynamic)
+        if static:
+            self.space.add_static(*static)
+
+    def remove(self, actors):
+        """Remove all the actors' pymunk objects with as few calls as we can."""
+        dynamic, static = map(self._probes, _split(actors))
+        if dynamic:
+            self.space.remove(*dynamic)
+        if static:
+            self.space.remove_static(*static)
+
+    def state(self, balls):
+        """An (N, 3) array of x, y, mass of these balls."""
+        return forces.gather(balls, 'x', 'y', 'mass')
+
+    def set_forces(self, balls, forces):
+        """Set the force on each ball from an (N, 2) array."""
+        for ball, (forcex, forcey) in zip(balls, forces.tolist()):
+            ball.body._set_force((forcex, forcey))
+
+    def step(self, dt):
+        self.space.step(dt)
+
+#----------------------------------------------------------------
+# NumPy.
+
+Vec2 = collections.namedtuple('Vec2', 'x y')
+
+class Body(object):
+    """
+    A body in a NumpyBackend. While it is in the backend its position,
+    velocity and force live in the backend's arrays at slot, otherwise
+    here.
+
+    """
+
+    # nothing spins in here.
+    angular_velocity = 0.0
+
+    def __init__(self, backend, x, y, mass, static):
+        self.backend = backend
+        self.slot = None
+        self.mass = mass
+        self.static = static
+
+        self._position = Vec2(float(x), float(y))
+        self._velocity = Vec2(0.0, 0.0)
+        self._force = Vec2(0.0, 0.0)
+
+    @property
+    def position(self):
+        if self.slot is None:
+            return self._position
+        return Vec2(*self.backend.position[self.slot].tolist())
+
+    @position.setter
+    def position(self, x_y):
+        if self.slot is None:
+            self._position = Vec2(*map(float, x_y))
+            if self.static:
+                # sensors on this body have moved.
+                self.backend._sensors = None
+        else:
+            self.backend.position[self.slot] = x_y
+
+    @property
+    def velocity(self):
+        if self.slot is None:
+            return self._velocity
+        return Vec2(*self.backend.velocity[self.slot].tolist())
+
+    @velocity.setter
+    def velocity(self, value):
+        if self.slot is None:
+            self._velocity = Vec2(*map(float, value))
+        else:
+            self.backend.velocity[self.slot] = value
+
+    @property
+    def force(self):
+        if self.slot is None:
+            return self._force
+        return Vec2(*self.backend.force[self.slot].tolist())
+
+    @force.setter
+    def force(self, value):
+        if self.slot is None:
+            self._force = Vec2(*map(float, value))
+        else:
+            self.backend.force[self.slot] = value
+
+class Shape(object):
+    """A circle (half_width None) or a box, on a Body."""
+
+    def __init__(self, body, elem, radius=0.0, half_width=None,
+                 half_height=None):
+        self.body = body
+        self.elem = elem
+        self.radius = radius
+        self.half_width, self.half_height = half_width, half_height
+
+        # how big we are to a sensor, see PymunkBackend.circle.
+        self.sensor_radius = getattr(elem, 'sensor_radius', None)
+        if self.sensor_radius is None:
+            self.sensor_radius = radius
+
+        self.collision_type = getattr(elem, 'collision', DEFAULT_TYPE)
+        self.layers = getattr(elem, 'layers', ALL_LAYERS)
+        self.sensor = getattr(elem, 'sensor', False)
+
+    def point_query(self, x_y):
+        """True if x, y is inside us."""
+        x, y = x_y
+        position = self.body.position
+        dx, dy = x - position.x, y - position.y
+        if self.half_width is None:
+            return dx * dx + dy * dy <= self.radius * self.radius
+        return abs(dx) <= self.half_width and abs(dy) <= self.half_height
+
+class NumpyBackend(object):
+    """
+    Moves every ball at once, held as structure of arrays: position,
+    velocity and force are (capacity, 2) arrays, a ball's row is its
+    body's slot.
+
+    Only dynamic circles (balls) move, and they only touch sensors:
+    circles and boxes that never move unless their body is moved by hand.
+    Balls pass through each other rather than bounce off each other like
+    they do in pymunk.
+
+    integrator 'leapfrog' kicks then drifts, v += f / m * (h + dt) / 2
+    then x += v * dt where h is the ball's last step (0 when it's new).
+    That keeps orbits round and stays in step when a ball changes how big
+    its steps are, which substeps need. 'symplectic' is plain symplectic
+    Euler, v += f / m * dt then x += v * dt: as round, but it goes out of
+    step each time a ball's step changes size, so substeps make close
+    passes worse rather than better. 'euler' drifts then kicks, the way
+    pymunk does it, to compare against.
+
+    A ball close to a sensor, or being pulled hard, is moved in up to
+    max_substeps smaller steps so it can't jump past a vortex core, see
+    substeps. Everything else takes the whole step at once. Between
+    substeps its force comes from gravity, a function from an (N, 3) array
+    of x, y, mass to an (N, 2) array of forces, or stays as set if there
+    isn't one.
+
+    So by default balls don't follow pymunk's path: they follow a closer
+    one to the real thing, and hit a vortex they would have jumped past in
+    pymunk. integrator 'euler' with max_substeps 1 moves them exactly as
+    pymunk does. benchmarks/bench_physics.py checks both.
+    """
+
+    name = 'numpy'
+
+    integrator = 'leapfrog'
+
+    max_substeps = MAX_SUBSTEPS
+    gravity = None
+
+    def __init__(self, capacity=64):
+        self.position = numpy.zeros((capacity, 2))
+        self.velocity = numpy.zeros((capacity, 2))
+        self.force = numpy.zeros((capacity, 2))
+        self.mass = numpy.ones(capacity)
+
+        # how big each ball is to a sensor, see Shape.sensor_radius.
+        self.radius = numpy.zeros(capacity)
+        self.layers = numpy.zeros(capacity, dtype=numpy.int64)
+        self.kind = numpy.zeros(capacity, dtype=numpy.int64)
+
+        # how long each ball's last step or substep was.
+        self.last_step = numpy.zeros(capacity)
+
+        # the Body in each slot, or None if free.
+        self.bodies = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+
+        # slots in use, in order, and the ball shape in each.
+        self.active = numpy.zeros(0, dtype=numpy.int64)
+        self._shapes = {}
+
+        # sensor shapes, and their positions and sizes as arrays once
+        # looked at, see _sensor_arrays.
+        self.sensors = []
+        self._sensors = None
+
+        # (kind, other): callback, and the (body, shape) pairs touching.
+        self._handlers = {}
+        self._touching = set()
+
+        # the most substeps any ball has taken in one step, and how many
+        # times a ball's step has been split up.
+        self.most_substeps = 1
+        self.substepped = 0
+
+    def circle(self, elem, x, y, mass, radius):
+        """A body and circle shape for elem, at x, y."""
+        body = Body(self, x, y, mass, getattr(elem, 'static', False))
+        return body, Shape(body, elem, radius=radius)
+
+    def box(self, elem, x, y, half_width, half_height):
+        """An immovable body and box shape for elem, centred on x, y."""
+        body = Body(self, x, y, None, True)
+        return body, Shape(body, elem, half_width=half_width,
+                           half_height=half_height)
+
+    def on_hit(self, kind, other, callback):
+        """
+        Call callback(elem, other_elem) when a ball of collision type kind
+        starts touching a sensor of type other.
+
+        A ball being substepped stops where the hit happened, for the rest
+        of that step, where pymunk would carry it on to the end of the
+        step. The game kills a ball that hits anything, so it never
+        matters there, but a handler that keeps the ball should expect it
+        to have lost part of a step.
+        """
+        self._handlers[kind, other] = callback
+
+    def _grow(self):
+        have = len(self.bodies)
+        for name in ('position', 'velocity', 'force', 'mass', 'radius',
+                     'layers', 'kind', 'last_step'):
+            old = getattr(self, name)
+            new = numpy.zeros((have * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:have] = old
+            setattr(self, name, new)
+        self.bodies.extend([None] * have)
+        self._free.extend(range(have * 2 - 1, have - 1, -1))
+
+    def _add_body(self, body, shape):
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+
+        self.position[slot] = body._position
+        self.velocity[slot] = body._velocity
+        self.force[slot] = body._force
+        self.mass[slot] = body.mass
+        self.radius[slot] = shape.sensor_radius if shape is not None else 0.0
+        self.layers[slot] = shape.layers if shape is not None else 0
+        self.kind[slot] = shape.collision_type if shape is not None else 0
+        self.last_step[slot] = 0.0
+        self.bodies[slot] = body
+        self._shapes[slot] = shape
+        body.slot = slot
+
+    def _remove_body(self, body):
+        slot = body.slot
+        body.slot = None
+        body._position = Vec2(*self.position[slot].tolist())
+        body._velocity = Vec2(*self.velocity[slot].tolist())
+        body._force = Vec2(*self.force[slot].tolist())
+        self.bodies[slot] = None
+        del self._shapes[slot]
+        self._free.append(slot)
+
+        self._touching = set(pair for pair in self._touching
+                             if pair[0] is not body)
+
+    def add(self, actors):
+        """Put the actors' bodies and shapes in."""
+        dynamic, static = _split(actors)
+        bodies = [item for item in dynamic if isinstance(item, Body)]
+        shapes = dict((shape.body, shape) for shape in dynamic + static
+                      if isinstance(shape, Shape))
+
+        for body in bodies:
+            shape = shapes.pop(body, None)
+            if body.slot is None and not body.static:
+                self._add_body(body, shape)
+
+        # whatever is left doesn't move.
+        if shapes:
+            self.sensors.extend(shapes.values())
+            self._sensors = None
+        self._reindex()
+
+    def remove(self, actors):
+        """Take the actors' bodies and shapes out."""
+        dynamic, static = _split(actors)
+        for item in dynamic + static:
+            if isinstance(item, Body) and item.slot is not None:
+                self._remove_body(item)
+            elif isinstance(item, Shape) and item in self.sensors:
+                self.sensors.remove(item)
+                self._sensors = None
+                self._touching = set(pair for pair in self._touching
+                                     if pair[1] is not item)
+        self._reindex()
+
+    def _reindex(self):
+        self.active = numpy.array([slot for slot, body in
+                                   enumerate(self.bodies) if body is not None],
+                                  dtype=numpy.int64)
+
+    def state(self, balls):
+        """An (N, 3) array of x, y, mass of these balls."""
+        slots = [ball.body.slot for ball in balls]
+        return numpy.column_stack((self.position[slots], self.mass[slots]))
+
+    def set_forces(self, balls, forces):
+        """Set the force on each ball from an (N, 2) array."""
+        self.force[[ball.body.slot for ball in balls]] = forces
+
+    def step(self, dt):
+        """Move every ball on dt seconds, then see what they hit."""
+        slots = self.active
+        if not len(slots):
+            return
+
+        accel = self.force[slots] / self.mass[slots, None]
+        steps = self.substeps(slots, accel, dt)
+        split = steps > 1
+
+        whole = ~split
+        self._integrate(slots[whole], accel[whole],
+                        numpy.full(int(whole.sum()), float(dt)))
+        self.hit_test(slots[whole])
+
+        if split.any():
+            self._substep(slots[split], accel[split], steps[split], dt)
+            self.most_substeps = max(self.most_substeps, int(steps.max()))
+            self.substepped += int(split.sum())
+
+    def _integrate(self, slots, accel, dt):
+        """One step for each ball in slots, dt long (an array, per ball)."""
+        drift = dt[:, None]
+        if self.integrator == 'euler':
+            self.position[slots] += self.velocity[slots] * drift
+            self.velocity[slots] += accel * drift
+        elif self.integrator == 'symplectic':
+            self.velocity[slots] += accel * drift
+            self.position[slots] += self.velocity[slots] * drift
+        else:
+            kick = (self.last_step[slots] + dt)[:, None] * 0.5
+            self.velocity[slots] += accel * kick
+            self.position[slots] += self.velocity[slots] * drift
+        self.last_step[slots] = dt
+
+    def _substep(self, slots, accel, steps, dt):
+        """
+        Move each ball on dt in its own number of steps. A ball that hits
+        something stops where it is for the rest of dt (see on_hit), so
+        like a whole step it hits one thing at most.
+
+        """
+        hit = numpy.zeros(len(self.bodies), dtype=bool)
+        for done in range(int(steps.max())):
+            going = (steps > done) & ~hit[slots]
+            slots, accel, steps = slots[going], accel[going], steps[going]
+            if not len(slots):
+                break
+
+            if done and self.gravity is not None:
+                state = numpy.column_stack((self.position[slots],
+                                            self.mass[slots]))
+                accel = self.gravity(state) / self.mass[slots, None]
+
+            self._integrate(slots, accel, dt / steps)
+            hit[self.hit_test(slots)] = True
+
+    def substeps(self, slots, accel, dt):
+        """
+        How many steps each ball should take dt in, at most max_substeps.
+
+        Enough that the pull over one of them moves a ball no more than
+        SUBSTEP_KICK pixels, and that none takes a ball more than
+        SUBSTEP_CLOSENESS of the way to the nearest sensor it can hit.
+        """
+        steps = numpy.ones(len(slots), dtype=numpy.int64)
+        if self.max_substeps <= 1:
+            return steps
+
+        pull = numpy.hypot(accel[:, 0], accel[:, 1])
+        steps = numpy.maximum(steps, numpy.ceil(
+                dt * numpy.sqrt(pull / SUBSTEP_KICK)).astype(numpy.int64))
+
+        if self._handlers and self.sensors:
+            # a pixel off is as close as it gets, closer is already a hit.
+            gap = numpy.maximum(self._gaps(slots).min(axis=1), 1.0)
+            velocity = self.velocity[slots]
+            travel = numpy.hypot(velocity[:, 0], velocity[:, 1]) * dt
+            steps = numpy.maximum(steps, numpy.ceil(
+                    travel / (SUBSTEP_CLOSENESS * gap)).astype(numpy.int64))
+
+        return numpy.minimum(steps, self.max_substeps)
+
+    def _sensor_arrays(self):
+        """Positions and sizes of the sensors, made again when they change."""
+        if self._sensors is None:
+            sensors = self.sensors
+            position = numpy.array([tuple(s.body.position) for s in sensors],
+                                   dtype=numpy.float64).reshape(-1, 2)
+            box = numpy.array([s.half_width is not None for s in sensors],
+                              dtype=bool)
+            size = numpy.array([(s.radius, 0.0) if s.half_width is None else
+                                (s.half_width, s.half_height)
+                                for s in sensors],
+                               dtype=numpy.float64).reshape(-1, 2)
+            layers = numpy.array([s.layers for s in sensors],
+                                 dtype=numpy.int64)
+            kind = numpy.array([s.collision_type for s in sensors],
+                               dtype=numpy.int64)
+            self._sensors = position, box, size, layers, kind
+        return self._sensors
+
+    def _gaps(self, slots):
+        """
+        How far each ball's edge is from the edge of each sensor, (N, S)
+        with inf for sensors it can't hit. Negative is touching.
+
+        """
+        where, box, size, layers, kind = self._sensor_arrays()
+        position = self.position[slots]
+
+        # from the middle of a circle, from the nearest edge of a box:
+        # outside it the distance to its nearest point, inside less than
+        # nothing by how far it is to the nearest side.
+        dx = position[:, 0, None] - where[:, 0]
+        dy = position[:, 1, None] - where[:, 1]
+        outx = numpy.abs(dx) - size[:, 0]
+        outy = numpy.abs(dy) - size[:, 1]
+        to_box = (numpy.hypot(numpy.maximum(outx, 0.0),
+                              numpy.maximum(outy, 0.0)) +
+                  numpy.minimum(numpy.maximum(outx, outy), 0.0))
+        to_circle = numpy.hypot(dx, dy) - size[:, 0]
+        gaps = (numpy.where(box, to_box, to_circle) -
+                self.radius[slots, None])
+
+        # only things on a shared layer, with someone listening.
+        hittable = (self.layers[slots, None] & layers) != 0
+        handled = numpy.zeros(gaps.shape, dtype=bool)
+        ball_kind = self.kind[slots]
+        for (one, other) in self._handlers:
+            handled |= (ball_kind == one)[:, None] & (kind == other)
+        gaps[~(hittable & handled)] = numpy.inf
+        return gaps
+
+    def hit_test(self, slots=None):
+        """
+        Find every ball (in slots, or all of them) touching a sensor, and
+        call the handler for the first pair of each ball that wasn't
+        touching last time, so a ball hits one thing a step at most.
+
+        Returns the slots of the balls that hit something.
+        """
+        if slots is None:
+            slots, keep = self.active, set()
+        else:
+            moved = set(self.bodies[slot] for slot in slots.tolist())
+            keep = set(pair for pair in self._touching
+                       if pair[0] not in moved)
+
+        hit = []
+        if not self._handlers or not self.sensors or not len(slots):
+            self._touching = keep
+            return hit
+
+        now = set()
+        for n, m in zip(*numpy.nonzero(self._gaps(slots) < 0)):
+            slot = slots[n]
+            shape, sensor = self._shapes[slot], self.sensors[m]
+            pair = (shape.body, sensor)
+            now.add(pair)
+            if pair not in self._touching and (not hit or hit[-1] != slot):
+                callback = self._handlers[shape.collision_type,
+                                          sensor.collision_type]
+                callback(shape.elem, sensor.elem)
+                hit.append(slot)
+
+        self._touching = keep | now
+        return hit
+
+# the backends by name.
+BACKENDS = {
+    PymunkBackend.name: PymunkBackend,
+    NumpyBackend.name: NumpyBackend,
+}
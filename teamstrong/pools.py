@@ -0,0 +1,85 @@
+"""
+Object pools
+============
+
+Every shot used to cost a new Ball with its own sprite, pymunk body and
+shape, none of which were ever cleaned up. A Pool keeps dead objects around
+and hands them out again instead.
+
+Pooled objects need three methods:
+
+    reset(*args)  - get ready to be used again, same args as the factory.
+    retire()      - go quiet (hide sprites and the like) while in the pool.
+    destroy()     - free anything that won't be garbage collected.
+
+example of use:
+
+    balls = Pool(functools.partial(make_ball, batch=batch, ...))
+
+    ball = balls.acquire(x, y)
+
+    # (..) later, when it dies.
+    balls.release(ball)
+
+Shrinking: the pool remembers the most objects it had out at once (the high
+water mark). Every so many releases, spare objects beyond what it would take
+to get back to that mark are destroyed and the mark starts over.
+"""
+from constants import POOL_SHRINK_EVERY
+
+class Pool(object):
+
+    def __init__(self, factory, shrink_every=POOL_SHRINK_EVERY):
+        self.factory = factory
+        self.shrink_every = shrink_every
+
+        self._free = []
+        self._releases = 0
+
+        # objects out right now, and the most out at once since last shrink.
+        self.live = 0
+        self.high_water = 0
+
+        # lifetime counters.
+        self.created = 0
+        self.reused = 0
+        self.destroyed = 0
+
+    def acquire(self, *args, **kwargs):
+        """Return a reset spare object, or a brand new one if none spare."""
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            obj = self.factory(*args, **kwargs)
+            obj.pool = self
+            self.created += 1
+
+        self.live += 1
+        self.high_water = max(self.high_water, self.live)
+        return obj
+
+    def release(self, obj):
+        """Take an object back, it must have come from this pool."""
+        obj.retire()
+        self._free.append(obj)
+        self.live -= 1
+
+        self._releases += 1
+        if self._releases >= self.shrink_every:
+            self.shrink()
+
+    def shrink(self):
+        """Destroy spare objects we haven't needed lately."""
+        keep = max(self.high_water - self.live, 0)
+        while len(self._free) > keep:
+            self._free.pop().destroy()
+            self.destroyed += 1
+
+        self.high_water = self.live
+        self._releases = 0
+
+    @property
+    def spare(self):
+        return len(self._free)
@@ -0,0 +1,121 @@
+"""
+Asset prefetch
+==============
+
+Gets a game ready to start while the player is still looking at the menu.
+
+A worker thread imports the slow modules the game will want and decodes
+every image it will want (through the on disk image cache, so it gets warmed
+too). GL calls have to stay on the main
+thread, so the decoded images are handed back and uploaded to textures a
+few at a time from the pyglet clock, a slice per frame, so the menu never
+stutters. Anything else that needs doing first goes in 'finish' and is run
+on the main thread once everything is uploaded.
+
+example of use:
+
+    prefetcher = Prefetcher(['ball.png', 'x.png'], finish=[pymunk.init_pymunk])
+    prefetcher.start()
+
+    # (..) the player picked a level, whatever isn't done yet gets done now.
+    prefetcher.finish()
+"""
+import importlib
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from pyglet import clock
+
+import data
+
+class Prefetcher(object):
+
+    def __init__(self, filenames, imports=(), finish=(), uploads_per_frame=1,
+                 interval=1 / 60.0):
+        self.filenames = list(filenames)
+        self.imports = list(imports)
+        self.finishers = list(finish)
+        self.uploads_per_frame = uploads_per_frame
+        self.interval = interval
+
+        # (filename, decoded image or None if it failed) from the worker.
+        self._decoded = queue.Queue()
+        self._worker = None
+        self._uploaded = 0
+
+        self.done = False
+        self.started = None
+        self.took = None
+
+    def start(self):
+        """Start decoding in the background and uploading every frame."""
+        self.started = time.time()
+        self._worker = threading.Thread(target=self._decode,
+                                        name='prefetch')
+        self._worker.daemon = True
+        self._worker.start()
+        clock.schedule_interval(self.step, self.interval)
+        return self
+
+    def _decode(self):
+        """Worker thread, no GL in here."""
+        for name in self.imports:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+        for filename in self.filenames:
+            try:
+                image = data.decode(filename)
+            except Exception:
+                # the main thread will have another go, and complain.
+                image = None
+            self._decoded.put((filename, image))
+
+    def _upload(self, block):
+        """Upload one decoded image, returns False if none was ready."""
+        try:
+            filename, image = self._decoded.get(block)
+        except queue.Empty:
+            return False
+
+        if image is not None:
+            data.warm(filename, image)
+        data.texture(filename)
+        self._uploaded += 1
+        return True
+
+    def step(self, dt=None):
+        """Upload a slice of what has been decoded, from the pyglet clock."""
+        for _ in range(self.uploads_per_frame):
+            if self._uploaded == len(self.filenames):
+                self._finish()
+                return
+            if not self._upload(block=False):
+                return
+
+    def finish(self):
+        """Do everything that is left right now, waiting if we have to."""
+        if self.done:
+            return
+        if self._worker is None:
+            self.start()
+
+        while self._uploaded < len(self.filenames):
+            self._upload(block=True)
+        self._finish()
+
+    def _finish(self):
+        if self.done:
+            return
+        clock.unschedule(self.step)
+        for fn in self.finishers:
+            fn()
+        self.done = True
+        self.took = time.time() - self.started
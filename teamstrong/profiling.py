@@ -0,0 +1,187 @@
+"""
+Profiling helpers
+=================
+
+Bits for measuring the game while it runs. All of them do nothing unless
+switched on, usually from the command line.
+
+--cpu-usage: once a second print how much of that second the process
+             spent busy on the CPU, and how many frames were drawn.
+
+--first-frame: print how long it took from picking a level to seeing it.
+
+--profile-startup: print where the time went between launching and the
+                   first frame, by import and by phase (see phase()).
+
+--redraw-always: redraw the menu as fast as possible, the way it did before
+                 it only redrew on changes, to compare against.
+
+texture_binds(batch) counts the texture switches drawing a batch costs.
+"""
+from __future__ import print_function
+
+import collections
+import os
+import sys
+import threading
+import time
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+# the CpuMeter when one has been started.
+cpu = None
+
+# the StartupProfile, until the first frame is drawn.
+startup = None
+
+# print the time from asking for a level to its first frame, and when it
+# was asked for if that frame hasn't been drawn yet.
+report_first_frame = False
+_level_requested = None
+
+class CpuMeter(object):
+    """Measures the busy fraction of the process between reports."""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.frames = 0
+        self._mark()
+
+    def _mark(self):
+        user, system = os.times()[:2]
+        self._cpu = user + system
+        self._wall = time.time()
+
+    def report(self, dt=None):
+        """Print and return the busy fraction since the last report."""
+        cpu, wall = self._cpu, self._wall
+        self._mark()
+
+        elapsed = self._wall - wall
+        busy = (self._cpu - cpu) / elapsed if elapsed else 0.0
+        per_minute = self.frames * 60 / elapsed if elapsed else 0.0
+        print('cpu %5.1f%% busy, %3d frames in %.1fs (%d a minute)' %
+              (busy * 100, self.frames, elapsed, per_minute), file=self.out)
+
+        self.frames = 0
+        return busy
+
+class StartupProfile(object):
+    """
+    Times every import, less the time spent in the imports it made itself,
+    and each phase of starting up.
+
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.started = self._last = time.time()
+
+        # [(name, seconds)] in order, and seconds per module imported.
+        self.phases = []
+        self.imports = collections.Counter()
+
+        # seconds spent in nested imports, for each import in progress.
+        self._nested = []
+        self._import = None
+        self._thread = threading.current_thread()
+
+    def install(self):
+        self._import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self):
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+
+    def _timed_import(self, name, *args, **kwargs):
+        # the prefetch thread imports too, only time the main thread.
+        if threading.current_thread() is not self._thread:
+            return self._import(name, *args, **kwargs)
+
+        begin = time.time()
+        self._nested.append(0.0)
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            taken = time.time() - begin
+            self.imports[name] += taken - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += taken
+
+    def phase(self, name):
+        """The phase called name just finished."""
+        now = time.time()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self, slowest=15):
+        total = self._last - self.started
+        print('startup: %.1f ms to the first frame' % (total * 1000),
+              file=self.out)
+        for name, seconds in self.phases:
+            print('  %-24s %8.1f ms' % (name, seconds * 1000), file=self.out)
+
+        print('slowest imports (not counting their own imports):',
+              file=self.out)
+        for name, seconds in self.imports.most_common(slowest):
+            print('  %-24s %8.1f ms' % (name, seconds * 1000), file=self.out)
+
+def start_startup_profile():
+    """Start timing imports and phases, reported at the first frame."""
+    global startup
+    if startup is None:
+        startup = StartupProfile()
+        startup.install()
+    return startup
+
+def phase(name):
+    """Mark the end of a startup phase, if we are profiling startup."""
+    if startup is not None:
+        startup.phase(name)
+
+def start_cpu_meter(interval=1.0):
+    """Report CPU usage every interval seconds from the pyglet clock."""
+    from pyglet import clock
+
+    global cpu
+    if cpu is None:
+        cpu = CpuMeter()
+        clock.schedule_interval(cpu.report, interval)
+    return cpu
+
+def texture_binds(batch):
+    """
+    Number of textures bound each time batch is drawn: one per textured
+    group, since sprites sharing a texture (and blend) share a group.
+
+    """
+    return len([group for group in batch.group_map
+                if getattr(group, 'texture', None) is not None])
+
+def level_requested():
+    """Start the clock on the time to the first game frame."""
+    global _level_requested
+    _level_requested = time.time()
+
+def frame_drawn():
+    """Count a drawn frame, call this from on_draw."""
+    global _level_requested, startup
+    if cpu is not None:
+        cpu.frames += 1
+
+    if startup is not None:
+        startup.phase('first frame')
+        startup.uninstall()
+        startup.report()
+        startup = None
+
+    if _level_requested is not None:
+        if report_first_frame:
+            print('first game frame %.1f ms after picking the level' %
+                  ((time.time() - _level_requested) * 1000))
+        _level_requested = None
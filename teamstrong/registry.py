@@ -0,0 +1,81 @@
+"""
+Actor registry
+==============
+
+Keeps every actor in the game, filed by its class so we can grab all the
+Gravity or Ball objects without looking at everything else.
+
+Adding and removing are O(1) and everything iterates in the order it was
+added.
+
+example of use:
+
+    actors = ActorRegistry()
+    actors.append(ball)
+
+    for gravity in actors.of_type(Gravity):
+        ...
+
+    actors.remove(ball)
+"""
+import collections
+
+class ActorRegistry(object):
+
+    def __init__(self):
+        self._all = collections.OrderedDict()
+        self._types = collections.defaultdict(collections.OrderedDict)
+
+        # actors of each type flagged as on the screen.
+        self._onscreen = collections.defaultdict(set)
+
+    def append(self, actor):
+        """Add an actor, adding it twice does nothing."""
+        self._all[actor] = None
+        self._types[actor.__class__][actor] = None
+
+    def remove(self, actor):
+        """Remove an actor, raises ValueError if we never had it."""
+        try:
+            del self._all[actor]
+        except KeyError:
+            raise ValueError('%r is not a registered actor' % (actor,))
+
+        del self._types[actor.__class__][actor]
+        self._onscreen[actor.__class__].discard(actor)
+
+    def of_type(self, cls):
+        """
+        Return all actors whose class is exactly cls, in the order they were
+        added.
+
+        This is a live view, don't add or remove actors while iterating it.
+        """
+        return self._types[cls]
+
+    def count(self, cls):
+        return len(self._types[cls])
+
+    def set_onscreen(self, actor, onscreen):
+        """Record whether an actor is currently on the screen."""
+        if actor not in self._all:
+            return
+
+        if onscreen:
+            self._onscreen[actor.__class__].add(actor)
+        else:
+            self._onscreen[actor.__class__].discard(actor)
+
+    def count_onscreen(self, cls):
+        """How many actors of exactly this class are on the screen."""
+        return len(self._onscreen[cls])
+
+    def __iter__(self):
+        # iterate a copy so actors can come and go during the loop.
+        return iter(list(self._all))
+
+    def __len__(self):
+        return len(self._all)
+
+    def __contains__(self, actor):
+        return actor in self._all
@@ -41,3 +41,11 @@ def signal(name, *args, **kwargs):
     for fn in _register[name]:
         fn(*args, **kwargs)
 
+
+def clear(name=None):
+    """Forget every callback for the signal 'name', or for every signal."""
+
+    if name is None:
+        _register.clear()
+    else:
+        _register.pop(name, None)
@@ -103,18 +103,48 @@ See 'demo.py' in the enclosing directory for a brief tutorial.
 __author__ =  'Tristam MacDonald'
 __version__=  '1.0.3'
 
-from theme import Theme
-from frame import Frame
+import importlib
+import sys
+import types
 
-from dialogue import Dialogue
+# every widget module imports pyglet and friends, so each is only imported
+# when something from it is first asked for: name -> module
+_exports = {
+	'Theme': 'theme',
+	'Frame': 'frame',
+	
+	'Dialogue': 'dialogue',
+	
+	'Container': 'container',
+	'HLayout': 'layout',
+	'VLayout': 'layout',
+	'FlowLayout': 'flow_layout',
+	'FoldingBox': 'folding_box',
+	
+	'Label': 'label',
+	'Checkbox': 'checkbox',
+	'Button': 'button',
+	'TextInput': 'text_input',
+	'Slider': 'slider',
+}
+
+class _LazyModule(types.ModuleType):
+	def __getattr__(self, name):
+		try:
+			module = _exports[name]
+		except KeyError:
+			raise AttributeError(name)
+		
+		value = getattr(importlib.import_module('.' + module, self.__name__), name)
+		setattr(self, name, value)
+		return value
+
+__all__ = sorted(_exports)
 
-from container import Container
-from layout import HLayout, VLayout
-from flow_layout import FlowLayout
-from folding_box import FoldingBox
+_lazy = _LazyModule(__name__, __doc__)
+_lazy.__dict__.update(dict((k, v) for (k, v) in globals().items()
+		if k.startswith('__') or k in ('_exports', '_LazyModule')))
 
-from label import Label
-from checkbox import Checkbox
-from button import Button
-from text_input import TextInput
-from slider import Slider
+# python 2 empties a module's globals once nothing refers to it, keep ours
+_lazy._module = sys.modules[__name__]
+sys.modules[__name__] = _lazy
@@ -45,12 +45,21 @@ except ImportError:
 		sys.exit(0)
 
 class Theme(dict):
-	def __init__(self, arg):
-		loader = pyglet.resource.Loader(path=arg)
+	def __init__(self, arg, load_file=None, load_image=None):
+		# load_file(path) and load_image(path) let the caller find (and cache)
+		# the theme's files, arg is then a directory they understand
+		if load_file is None or load_image is None:
+			loader = pyglet.resource.Loader(path=arg)
 		
-		input = json.loads( loader.file('theme.json').read() )
+		if load_file is None:
+			input = json.loads( loader.file('theme.json').read() )
+		else:
+			input = json.loads( load_file( arg + '/theme.json' ).read() )
 		
-		image = loader.texture( input['image'] )
+		if load_image is None:
+			image = loader.texture( input['image'] )
+		else:
+			image = load_image( arg + '/' + input['image'] ).get_texture()
 		
 		for k, v in input.iteritems():
 			if isinstance(v, dict):
@@ -0,0 +1,617 @@
+"""
+Game simulation
+===============
+
+The rules of Schrocat with nothing drawn: the physics backend, the actors,
+the signals between them, the meters and the level. Schrocat puts a window
+and sprites on top of this. On its own it runs headless, no window, no
+textures and no frame cap, as fast as the CPU will go.
+
+example of use:
+
+    sim = Simulation().init(levels=[LevelOne])
+    ticks = sim.run(shots=[(0, 'shoot', 400, 300), (90, 'shoot', 420, 280)])
+
+    print(sim.score)
+
+or from the command line, see main:
+
+    python run_sim.py --level 2 --games 100 shots.txt
+"""
+from __future__ import print_function
+
+import argparse
+import collections
+import functools
+import random
+import struct
+import time
+
+import atlas
+import data
+import forces
+import physics
+import signals
+from registry import ActorRegistry
+from commands import CommandBuffer
+from pools import Pool
+from bounds import WorldBounds
+from actors import Ball, Gravity, Cat, Turret, Meter, NullImage
+from actors import make_ball, make_gravity, make_x, init_pymunk
+
+from constants import BALL_TYPE, GRAVITY_TYPE, CAT_TYPE
+from constants import PHYSICS_RATE, MAX_CATCHUP_STEPS, BARNES_HUT_THETA
+from signals import register, signal
+
+class Simulation(object):
+    _over = False
+
+    # sum gravity for every ball at once, falls back to each ball asking
+    # each gravity when numpy isn't installed. None means whichever we can.
+    batched_forces = None
+
+    # look the pull up in a forces.ForceField grid rather than summing it,
+    # only when batched.
+    force_field = False
+
+    # opening angle for forces.BarnesHut, which takes over from the exact
+    # sum once there are BARNES_HUT_WELLS vortexes and BARNES_HUT_PAIRS balls
+    # x vortexes. None never uses it.
+    barnes_hut_theta = BARNES_HUT_THETA
+
+    # physics steps per game second.
+    physics_rate = PHYSICS_RATE
+
+    # which of physics.BACKENDS moves things about. numpy falls back to
+    # pymunk when numpy isn't installed.
+    physics_backend = 'pymunk'
+
+    def __init__(self, width=640, height=480):
+        self.size = width, height
+
+    def get_size(self):
+        return self.size
+
+    @property
+    def width(self):
+        return self.get_size()[0]
+
+    @property
+    def height(self):
+        return self.get_size()[1]
+
+    def init(self, levels):
+        """Expects a levels keyword argument."""
+        self.level = level = levels[0]()
+        if self.batched_forces is None:
+            self.batched_forces = bool(forces.numpy)
+
+        # callbacks left over from the last game would still fire.
+        signals.clear()
+
+        self.images = {}
+        self.actors = ActorRegistry()
+        self.commands = CommandBuffer()
+
+        # the physics backend, and our images
+        self.init_content()
+
+        # batches and anything else only there to be looked at.
+        self.init_presentation()
+
+        # recycle the things that come and go a lot.
+        self.pools = {
+            'ball': Pool(functools.partial(make_ball, batch=self.batch,
+                            image=self.images['ball'], backend=self.backend)),
+            'gravity': Pool(functools.partial(make_gravity, batch=self.batch,
+                            image=self.images['gravity'], backend=self.backend)),
+        }
+        if self.batch is not None:
+            self.pools['x'] = Pool(functools.partial(make_x,
+                            batch=self.batch, image=self.images['x']))
+            self.pools['trail'] = Pool(functools.partial(make_x,
+                            batch=self.batch, image=self.images['trail']))
+
+        # window width and height.
+        width, height = self.get_size()
+
+        # seconds of game played, and where balls stop being worth keeping.
+        self.sim_time = 0.0
+        self.ticks = 0
+        self._accumulator = 0.0
+        self.bounds = WorldBounds(width, height)
+
+        self.field = None
+        if self.force_field and self.batched_forces:
+            self.field = forces.ForceField(width, height)
+
+        self.tree = None
+        if self.barnes_hut_theta is not None and self.batched_forces:
+            self.tree = forces.BarnesHut(theta=self.barnes_hut_theta)
+
+        # create a turret
+        (turx, tury) = level.turret
+        self.turret = Turret(turx * width, tury * height, self.batch,
+                    self.images['frame'], self.images['barrel'])
+        self.turret.initPowerBar(self.images['powerbar'], self.batch, 4, 25, 70)
+
+        self.spawn(self.turret)
+
+        #----------------------
+        # schrocat live on.
+        catx, caty = level.next_cat
+        cat = self._cat(catx * width, caty * width)
+
+        #----------------------
+        # make a bunch of vortexes..
+        vortexes_or_vortecii_which_is_correct = level.get_vortexes_for_level(1)
+        for v in vortexes_or_vortecii_which_is_correct:
+            (x, y), strength, level = v
+            gravity = self._gravity(x * width, y * height)
+            gravity.strength = strength
+
+        self._over = False
+
+        # balls that hit something this tick, and the balls and where they
+        # were before the step when update has that as an array, see sweep.
+        self._hit = set()
+        self._before = None
+
+        def make_callback_for(obj):
+
+            def someonehit(*args, **kwargs):
+                """ball or cat needs to remove 1 from meter qty."""
+                obj.remove(qty=1)
+            return someonehit
+
+        self.ballMeter = Meter(10, 80, 50, 340,
+                            (1.0,0.0,0.0), (0.0,1.0,0.0), 10, 5, True,
+                            batch=self.hud_batch)
+        self.catMeter = Meter(580, 80, 50, 340,
+                            (1.0,0.0,0.0), (0.0,1.0,0.0), 10, 5, True,
+                            batch=self.hud_batch)
+
+        self.catMeter.parent = self
+
+        # now make some callbacks to remove meter points when hit.
+        callback = make_callback_for(self.ballMeter)
+        register('shoot', callback)
+
+        callback = make_callback_for(self.catMeter)
+        register('cathit', callback)
+
+        add_three_balls = functools.partial(self.ballMeter.add, 3)
+        register('cathit', add_three_balls)
+
+        register('kill', self.remove_object)
+
+        # how the game went, for whoever is asking.
+        self.score = collections.Counter()
+        for name in ('shoot', 'cathit', 'vortexhit'):
+            register(name, functools.partial(self._count, name))
+
+        # get everything made above into the game.
+        self.sync()
+
+        return self
+
+    def _count(self, name, *args, **kwargs):
+        self.score[name] += 1
+
+    def init_content(self):
+        # load turret images, set rotational anchors, store for later
+        init_pymunk()
+
+        name = self.physics_backend
+        if name == physics.NumpyBackend.name and not forces.numpy:
+            name = physics.PymunkBackend.name
+        self.backend = physics.BACKENDS[name]()
+
+        # vortex cores and the cat are sensors: balls pass through them but
+        # the backend tells us when one starts touching.
+        self.backend.on_hit(BALL_TYPE, GRAVITY_TYPE, self.ball_hit_vortex)
+        self.backend.on_hit(BALL_TYPE, CAT_TYPE, self.ball_hit_cat)
+
+        self.images.update(self.load_images())
+
+    def load_images(self):
+        """Sizes of all our sprites without loading any, see NullImage."""
+        return headless_images()
+
+    def init_presentation(self):
+        """Nothing to draw to, so no batches or trails."""
+        self.batch = None
+        self.hud_batch = None
+        self.trails = None
+
+    def remove_object(self, obj, *args, **kwargs):
+        """
+        try to remove this object and pretend it never existed.
+
+        Happens at the end of the frame, see sync.
+        """
+        self.commands.kill(obj)
+
+    def spawn(self, obj):
+        """Add this object to the game at the end of the frame."""
+        self.commands.spawn(obj)
+
+    def sync(self):
+        """
+        End of frame sync point. Everything killed or spawned during the
+        frame is removed or added here, physics backend included.
+
+        """
+        spawned, killed = self.commands.flush(self.actors, self.backend)
+
+        # a new ball counts as on screen before it has had an update.
+        for obj in spawned:
+            if obj.__class__ == Ball:
+                self.actors.set_onscreen(obj, self.onscreen(obj.x, obj.y))
+
+        # back to the pool for the next one.
+        for obj in killed:
+            pool = getattr(obj, 'pool', None)
+            if pool is not None:
+                pool.release(obj)
+
+    def ball_hit_vortex(self, ball, gravity):
+        """Called by the backend when a ball touches a vortex core."""
+        self._hit.add(ball)
+
+        # we're in the middle of a physics step, so hold the signals until
+        # the end of the frame when the backend can be changed again.
+        self.commands.later(signal, 'vortexhit', gravity=gravity, ball=ball)
+
+        # well if that is the case, then time for the ball to die.
+        self.commands.later(signal, 'kill', ball)
+        return False
+
+    def ball_hit_cat(self, ball, cat):
+        """Called by the backend when a ball touches the cat."""
+        self._hit.add(ball)
+        self.commands.later(signal, 'cathit')
+        # well it did. it should surely die now.
+        self.commands.later(signal, 'kill', ball)
+        return False
+
+    def sweep(self):
+        """
+        Hit the cat with any ball that went right through it during the
+        step without the backend seeing, from where the ball was before
+        the step (see Ball.snapshot) to where it is now.
+
+        Only a ball that moved further than the cat's smaller half size
+        could have, the rest are left to the sensor. With the positions
+        from update that is one array test, not a look at every ball.
+        """
+        cat = self.cat
+        reach = min(cat.half_width, cat.half_height)
+
+        if self._before is not None:
+            balls, before = self._before
+            moved = abs(self.backend.state(balls)[:, :2] -
+                        before[:, :2]).max(axis=1)
+            fast = [balls[n] for n in (moved > reach).nonzero()[0]]
+        else:
+            fast = [ball for ball in self.balls
+                    if max(abs(ball.x - ball._last[0]),
+                           abs(ball.y - ball._last[1])) > reach]
+
+        for ball in fast:
+            if ball in self._hit:
+                continue
+            if cat.swept(ball._last, (ball.x, ball.y), ball.sensor_radius):
+                self.ball_hit_cat(ball, cat)
+
+    def advance(self, dt):
+        """
+        Run as many fixed physics ticks as dt seconds cover, dropping any
+        time past MAX_CATCHUP_STEPS ticks so a slow frame slows the game a
+        little rather than making the next frame slower still.
+
+        Returns how far we are between the last tick and the next, as a
+        fraction for render.
+        """
+        step = 1.0 / self.physics_rate
+        self._accumulator = min(self._accumulator + dt,
+                                step * MAX_CATCHUP_STEPS)
+
+        while self._accumulator >= step and not self._over:
+            self.tick(step)
+            self._accumulator -= step
+
+        return self._accumulator / step
+
+    def tick(self, dt):
+        """One fixed step of the game."""
+        for ball in self.balls:
+            ball.snapshot()
+
+        self.update()
+
+        # physics update. updates position of all children.
+        self._hit.clear()
+        self.backend.step(dt)
+        self.sweep()
+        self.sim_time += dt
+        self.ticks += 1
+
+        self.sync()
+        self.check_over()
+
+    def run(self, shots=(), max_ticks=None):
+        """
+        Play flat out, no clock, until the game is over, max_ticks have
+        run or every shot is taken and every ball gone.
+
+        shots are (tick, action, x, y): on that tick aim at x, y and
+        'shoot' a ball or lay a 'vortex', like a left or right click.
+
+        Returns the number of ticks run.
+        """
+        step = 1.0 / self.physics_rate
+        shots = collections.deque(sorted(shots))
+        start = self.ticks
+
+        while not self._over:
+            if max_ticks is not None and self.ticks - start >= max_ticks:
+                break
+
+            while shots and shots[0][0] <= self.ticks - start:
+                tick, action, x, y = shots.popleft()
+                self.turret.aim(x, y)
+                if action == 'vortex':
+                    self.lay_vortex(x, y)
+                else:
+                    self.shoot(x, y)
+
+            self.tick(step)
+
+            if not shots and not self.balls:
+                break
+
+        return self.ticks - start
+
+    def update(self):
+        # pull every ball towards the gravities in one hit. The backend
+        # looks the pull up again for balls it moves in more than one go,
+        # the gravities stay put until the end of the frame.
+        self._before = None
+        if self.batched_forces:
+            pull = forces.puller(list(self.gravities), self.field, self.tree)
+            self.backend.gravity = pull
+
+            balls = list(self.balls)
+            if balls:
+                state = self.backend.state(balls)
+                self.backend.set_forces(balls, pull(state))
+                self._before = balls, state
+
+        # update anything in the actorlist, turrets, cats, etc
+        for actor in self.actors:
+            actor.update()
+
+        if self.trails is not None:
+            self.trails.update(now=self.sim_time)
+
+        # stop simulating balls that have left for good.
+        gravities = self.gravities
+        for ball in self.balls:
+            if self.bounds.check(ball, gravities, self.sim_time):
+                self.remove_object(ball)
+
+    def check_over(self):
+        """See if the game is over, once the frame's actors are settled."""
+        # if the cat meter isn't active. Game complete buddy.
+        if not self.catMeter.active:
+            self._over = True
+
+        if not self.ballMeter.active:
+            if not self.actors.count_onscreen(Ball):
+                self._over = True
+
+    @property
+    def won(self):
+        return not self.catMeter.active
+
+    def shoot(self, x, y):
+        """
+        Shoot a ball from the turret, as aimed, if we have one left.
+        (LEFT CLICK at x, y)
+
+        """
+        if not self.ballMeter.active:
+            return None
+
+        # signal that we are making a bullet.
+        signal('shoot')
+        ball = self._bullet(x, y)
+
+        # make a new X marks the spot.
+        self._xmark(x, y)
+        return ball
+
+    def lay_vortex(self, x, y):
+        """Lay a new vortex at x, y. (RIGHT CLICK)"""
+        gravity = self._gravity(x, y)
+        self.ballMeter.add(3)
+        return gravity
+
+    @property
+    def gravities(self):
+        """Return all gravities."""
+        return self.actors.of_type(Gravity)
+
+    @property
+    def balls(self):
+        """Return all balls."""
+        return self.actors.of_type(Ball)
+
+    def _gravity(self, x, y):
+        """Make a gravity well near the click location."""
+        gravity = self.pools['gravity'].acquire(x, y)
+        gravity.parent = self
+        self.spawn(gravity)
+        register('vortexhit', gravity.hitbyball)
+        return gravity
+
+    def _bullet(self, x, y):
+        """Make a bullet and add it near the turret."""
+        xTip, yTip = self.turret.tip
+        sin, cos = self.turret.direction
+
+        maxLaunchVel = 600
+
+        speed = self.turret.power * maxLaunchVel
+
+        # create a crude velocity.
+        velx = sin * speed
+        vely = cos * speed
+
+        ball = self.pools['ball'].acquire(xTip, yTip)
+        ball.velocity = (velx, vely)
+        ball.parent = self
+        ball.born = self.sim_time
+
+        self.spawn(ball)
+        return ball
+
+    def _cat(self, x, y):
+        self.cat = Cat(x, y, self.batch,
+                    self.images['catbody'], self.images['cathead'],
+                    self.backend)
+        self.cat.parent = self
+        self.spawn(self.cat)
+        register('cathit', self.cat.move)
+        return self.cat
+
+    def _xmark(self, x, y):
+        # only there to be looked at.
+        if 'x' not in self.pools:
+            return None
+
+        x = self.pools['x'].acquire(x, y)
+        self.spawn(x)
+        return x
+
+    def onscreen(self, x, y):
+        """
+        Returns true if the given x, y is on screen.
+
+        """
+        within_x = 0 < x and x < self.width
+        within_y = 0 < y and y < self.height
+
+        return within_x and within_y
+
+def png_size(filename):
+    """Width and height of a PNG in the data directory, from its header."""
+    f = data.load(filename)
+    try:
+        # signature, IHDR length and type, then width and height.
+        return struct.unpack('>II', f.read(24)[16:24])
+    finally:
+        f.close()
+
+def headless_images():
+    """A NullImage the size of each of the game's sprites."""
+    images = {}
+    for (name, filename, ax, ay) in atlas.SPRITES:
+        width, height = png_size(filename)
+        images[name] = NullImage(width, height, width // ax, height // ay)
+    return images
+
+#----------------------------------------------------------------
+# Command line.
+
+def read_shots(f):
+    """
+    Read a shot list, one shot a line:
+
+        tick action x y
+
+    action is shoot or vortex. Blank lines and # comments are skipped.
+    """
+    shots = []
+    for line in f:
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        tick, action, x, y = line.split()
+        shots.append((int(tick), action, float(x), float(y)))
+    return shots
+
+# a few shots at the middle of the screen, when not given a shot list.
+DEFAULT_SHOTS = [(tick, 'shoot', 420 + 10 * i, 260 + 15 * i)
+                 for i, tick in enumerate(range(0, 300, 30))]
+
+def main(argv=None):
+    import levels
+
+    parser = argparse.ArgumentParser(
+            description='Play Schrocat headless from a shot list, as fast '
+                        'as the CPU allows.')
+    parser.add_argument('shots', nargs='?', type=argparse.FileType('r'),
+                        help='shot list, lines of: tick shoot|vortex x y')
+    parser.add_argument('--level', type=int, default=1, choices=[1, 2, 3])
+    parser.add_argument('--games', type=int, default=1)
+    parser.add_argument('--max-ticks', type=int, default=PHYSICS_RATE * 120,
+                        help='give up on a game after this many ticks')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed each game the same, for repeatable runs')
+    parser.add_argument('--force-field', action='store_true',
+                        help='look gravity up in a grid, see ForceField')
+    parser.add_argument('--physics', default=Simulation.physics_backend,
+                        choices=sorted(physics.BACKENDS),
+                        help='which physics backend moves the balls')
+    parser.add_argument('--theta', type=float, default=BARNES_HUT_THETA,
+                        help='Barnes-Hut opening angle once there are lots '
+                        'of vortexes, 0 for the exact sum')
+    args = parser.parse_args(argv)
+
+    # nothing we do wants a GL context, make sure pyglet doesn't make one.
+    try:
+        import pyglet
+        pyglet.options['shadow_window'] = False
+    except ImportError:
+        pass
+
+    shots = read_shots(args.shots) if args.shots else DEFAULT_SHOTS
+    level = [levels.LevelOne, levels.LevelTwo, levels.LevelThree][
+            args.level - 1]
+
+    sim = Simulation()
+    sim.force_field = args.force_field
+    sim.barnes_hut_theta = args.theta
+    sim.physics_backend = args.physics
+    totals = collections.Counter()
+    ticks = 0
+
+    begin = time.time()
+    for game in range(args.games):
+        if args.seed is not None:
+            random.seed(args.seed)
+
+        sim.init(levels=[level])
+        ran = sim.run(shots, max_ticks=args.max_ticks)
+        ticks += ran
+
+        totals.update(sim.score)
+        totals['won'] += sim.won
+        if args.games == 1:
+            outcome = 'won' if sim.won else 'lost' if sim._over else 'stopped'
+            print('%s after %d ticks (%.1f game seconds): %d shots, '
+                  '%d cat hits, %d vortex hits' % (
+                      outcome, ran, sim.sim_time,
+                      sim.score['shoot'], sim.score['cathit'],
+                      sim.score['vortexhit']))
+    taken = time.time() - begin
+
+    print('%d games, %d won, %d ticks in %.2fs: %d ticks/s, %d games/minute'
+          % (args.games, totals['won'], ticks, taken,
+             ticks / taken if taken else 0,
+             args.games * 60 / taken if taken else 0))
+
+if __name__ == '__main__':
+    main()
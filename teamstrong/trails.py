@@ -0,0 +1,107 @@
+"""
+Trail particles
+===============
+
+Balls leave a fading trail of dots behind them. Making each dot its own
+sprite (see X) gets expensive fast, so instead every dot lives in a row of
+a few numpy arrays and the whole lot is drawn as one vertex list of textured
+quads in the game's batch.
+
+The arrays are a fixed size ring buffer. When it is full the oldest dot is
+overwritten, faded or not.
+
+example of use:
+
+    trails = TrailSystem(images['trail'], batch)
+
+    # (..) every frame, for every ball on screen.
+    trails.emit(ball.x, ball.y)
+
+    # (..) once a frame.
+    trails.update()
+"""
+import time
+
+import pyglet
+from pyglet import gl
+
+from constants import TRAIL_CAPACITY
+from utils import lazy_import
+
+# numpy takes a while to import, so not until the first time it's used.
+numpy = lazy_import('numpy')
+
+class TrailSystem(object):
+
+    def __init__(self, image, batch, capacity=TRAIL_CAPACITY, opacity=255,
+                 minopacity=1, rate=1.01, seconds_to_live=10):
+        self.capacity = capacity
+        self.start_opacity = opacity
+        self.minopacity = minopacity
+        self.rate = rate
+        self.seconds_to_live = seconds_to_live
+
+        self.position = numpy.zeros((capacity, 2), dtype=numpy.float32)
+        self.opacity = numpy.zeros(capacity, dtype=numpy.float32)
+        self.born = numpy.zeros(capacity, dtype=numpy.float64)
+        self.alive = numpy.zeros(capacity, dtype=bool)
+
+        # where the next dot goes, and how many live dots got overwritten.
+        self._head = 0
+        self.evicted = 0
+
+        # corners of one quad relative to its dot, honouring the anchor.
+        left, bottom = -image.anchor_x, -image.anchor_y
+        right, top = left + image.width, bottom + image.height
+        self._corners = numpy.array([[left, bottom], [right, bottom],
+                                     [right, top], [left, top]],
+                                    dtype=numpy.float32)
+
+        texture = image.get_texture()
+        group = pyglet.sprite.SpriteGroup(texture, gl.GL_SRC_ALPHA,
+                                          gl.GL_ONE_MINUS_SRC_ALPHA)
+
+        self.vertex_list = batch.add(capacity * 4, gl.GL_QUADS, group,
+                    'v2f/stream',
+                    ('c4B/stream', (255, 255, 255, 0) * (capacity * 4)),
+                    ('t3f/static', tuple(texture.tex_coords) * capacity))
+
+    @property
+    def live(self):
+        """Number of dots still showing."""
+        return int(self.alive.sum())
+
+    def emit(self, x, y, now=None):
+        """Lay a new dot at x, y."""
+        i = self._head
+        if self.alive[i]:
+            self.evicted += 1
+
+        self.position[i] = x, y
+        self.opacity[i] = self.start_opacity
+        self.born[i] = time.time() if now is None else now
+        self.alive[i] = True
+
+        self._head = (i + 1) % self.capacity
+
+    def update(self, now=None):
+        """Fade every dot, drop the dead ones and upload to the batch."""
+        if now is None:
+            now = time.time()
+
+        self.opacity /= self.rate
+
+        dead = ((self.opacity < self.minopacity) |
+                (now - self.born > self.seconds_to_live))
+        self.alive &= ~dead
+        self.opacity[~self.alive] = 0
+
+        vertices = numpy.ctypeslib.as_array(self.vertex_list.vertices)
+        vertices[:] = (self.position[:, None, :] + self._corners).ravel()
+
+        colors = numpy.ctypeslib.as_array(self.vertex_list.colors)
+        colors.reshape(self.capacity, 4, 4)[:, :, 3] = \
+                self.opacity.astype(numpy.uint8)[:, None]
+
+    def delete(self):
+        self.vertex_list.delete()
@@ -3,64 +3,111 @@ A splash screen for our game.
 User can choose to read some information about the game, select a level
 or exit.
 
+Importing this does nothing, main() puts the menu up and runs the game.
+Anything heavy is imported in there, so it only happens when it's needed
+and shows up in --profile-startup.
 """
 
-import pyglet
+import sys
 
-import simplui as ui
-import levels
-import schrocat
+import profiling
 
-import data
-import utils
-
-window = schrocat.Schrocat(640, 480, caption='schrodengers cat',
-        vsync=False)
-
-themes = [ui.Theme(data.filepath('themes/pywidget'))]
-theme = 0
-
-frame = ui.Frame(themes[theme], w=640, h=480)
-
-img = pyglet.sprite.Sprite(schrocat.load_and_anchor('SplashScreen.png'))
-
-def onlevel(lvl):
+def onlevel(window, prefetcher, lvl):
     """
     Start Schrocat window with this level as an argument
 
     """
     def _(*args):
-        window.init(levels=[lvl]).main_loop()
+        profiling.level_requested()
+        prefetcher.finish()
+        window.init(levels=[lvl]).start()
     return _
 
-lvls = [levels.LevelOne, levels.LevelTwo, levels.LevelThree]
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    if '--cpu-usage' in argv:
+        profiling.start_cpu_meter()
+
+    if '--first-frame' in argv:
+        profiling.report_first_frame = True
+
+    import pyglet
+
+    import simplui as ui
+    import levels
+    import schrocat
+
+    import data
+    profiling.phase('imports')
+
+    window = schrocat.Schrocat(640, 480, caption='schrodengers cat',
+            vsync=False)
+    profiling.phase('window')
+
+    themes = [ui.Theme('themes/pywidget', load_file=data.load,
+                       load_image=data.decoded)]
+    theme = 0
+
+    frame = ui.Frame(themes[theme], w=640, h=480)
+
+    img = pyglet.sprite.Sprite(schrocat.load_and_anchor('SplashScreen.png'))
+    profiling.phase('theme and splash')
+
+    # get the game's images decoded and uploaded while the player picks a
+    # level.
+    prefetcher = schrocat.Schrocat.prefetcher().start()
+
+    lvls = [levels.LevelOne, levels.LevelTwo, levels.LevelThree]
+
+    lvl_buttons = [
+            ui.Button('Level %d' % (i + 1),
+                      action=onlevel(window, prefetcher, lvl))
+            for (i, lvl) in enumerate(lvls)
+    ]
+    window.push_handlers(frame)
+
+    dialogue = ui.Dialogue('Schrodingers Cat', x=520, y=380, content=
+            ui.VLayout(w=200, hpadding=20,
+                       children=lvl_buttons
+            )
+    )
 
-lvl_buttons = [
-        ui.Button('Level %d' % (i + 1), action=onlevel(lvl))
-        for (i, lvl) in enumerate(lvls)
-]
-window.push_handlers(frame)
+    frame.add(dialogue)
+    profiling.phase('widgets')
 
-dialogue = ui.Dialogue('Schrodingers Cat', x=520, y=380, content=
-        ui.VLayout(w=200, hpadding=20,
-                   children=lvl_buttons
-        )
-)
+    def invalidate(*args, **kwargs):
+        """
+        Ask for the menu to be redrawn, unless a game has the window.
+        Schedule this if anything on the menu ever changes on a timer.
 
-frame.add(dialogue)
+        """
+        if not window._window_active:
+            window.invalid = True
 
-@window.event
-def on_draw():
+    # nothing on the menu changes until something happens to it, so only
+    # redraw then and sleep the rest of the time.
+    window.push_handlers(**dict((name, invalidate) for name in (
+            'on_mouse_motion', 'on_mouse_press', 'on_mouse_release',
+            'on_mouse_drag', 'on_mouse_scroll', 'on_key_press',
+            'on_key_release', 'on_text', 'on_resize', 'on_expose', 'on_show',
+            'on_activate')))
 
-    if window._window_active:
-        return
+    # the old way: anything scheduled every tick redraws every window.
+    if '--redraw-always' in argv:
+        pyglet.clock.schedule(invalidate)
 
-    window.clear()
-    img.draw()
-    frame.draw()
+    @window.event
+    def on_draw():
 
-def update(dt): pass
+        if window._window_active:
+            return
 
-pyglet.clock.schedule(update)
+        window.clear()
+        img.draw()
+        frame.draw()
+        window.invalid = False
+        profiling.frame_drawn()
 
-pyglet.app.run()
+    pyglet.app.run()
@@ -1,3 +1,4 @@
+import importlib
 import itertools
 import math
 
@@ -44,6 +45,44 @@ def make_rotator(step=1, lim_left=None, lim_right=None):
             yield (counter.next() * step % 360)
     return rotator()
 
+class lazy_import(object):
+    """
+    Stands in for an optional module, importing it the first time it's
+    used rather than at startup. It is false if the module isn't installed.
+
+        numpy = lazy_import('numpy')
+
+        if numpy:
+            numpy.zeros(10)
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._missing = False
+
+    def _load(self):
+        if self._module is None and not self._missing:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                self._missing = True
+        return self._module
+
+    def __nonzero__(self):
+        return self._load() is not None
+    __bool__ = __nonzero__
+
+    def __getattr__(self, attr):
+        module = self._load()
+        if module is None:
+            raise AttributeError('%s is not installed' % self._name)
+
+        # keep it, so next time it comes straight out of our __dict__.
+        value = getattr(module, attr)
+        setattr(self, attr, value)
+        return value
+
 class CrudeVec(complex):
     """
     a crude (but clever?) Vector.